@@ -8,6 +8,7 @@ import signal
 from src.core.logging import setup_logging, app_logger
 from src.automation.automation import MainAutomation
 from src.core.cleanup import CleanupManager
+from src.core.template_registry import template_registry
 from src.automation.handler_factory import HandlerFactory
 from src.game import controls
 
@@ -79,6 +80,7 @@ def main():
         sys.exit(1)
     
     app_logger.info(f"Connected to device: {device_id}")
+    template_registry.load()
     
     cleanup_manager.set_skip_cleanup(args.no_cleanup)
     
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Dict, Any, List
 from src.automation.routines.routineBase import RoutineBase
 from src.core.config import CONFIG
+from src.core.image_processing import log_match_stats
 from src.core.logging import app_logger, setup_logging
 from src.automation.state import AutomationState
 from src.automation.handler_factory import HandlerFactory
@@ -31,8 +32,11 @@ class MainAutomation:
         """Cleanup resources"""
         try:
             app_logger.info("Cleaning up resources...")
+            controls.device.stop_frame_stream()
             controls.device.cleanup_temp_files()
             controls.device.cleanup_device_screenshots()
+            controls.device.log_performance_stats()
+            log_match_stats()
         except Exception as e:
             app_logger.error(f"Error during cleanup: {e}")
             
@@ -143,7 +147,8 @@ class MainAutomation:
                 else:
                     app_logger.error(f"Routine '{routine.routine_name}' failed. Attempting game reset.")
                     self.reset_game()
-                
+
+        controls.device.settle_stats.log_cycle()
         return True
 
     def handle_navigation_failure(self, consecutive_failures: int) -> None:
@@ -1,5 +1,6 @@
 from src.automation.routines import FlexibleRoutine
 from src.game import controls
+from src.game.device import GestureBatch
 
 class AllianceGiftsRoutine(FlexibleRoutine):
     force_home: bool = True
@@ -20,7 +21,7 @@ class AllianceGiftsRoutine(FlexibleRoutine):
         ):
             return True
             
-        controls.human_delay('menu_animation')
+        controls.human_delay('menu_animation', settle=True)
 
         # Click alliance gifts icon
         if not controls.find_template(
@@ -30,7 +31,7 @@ class AllianceGiftsRoutine(FlexibleRoutine):
         ):
             return True
         
-        controls.human_delay('menu_animation')
+        controls.human_delay('menu_animation', settle=True)
 
         # Click collect all button
         if controls.find_template(
@@ -38,10 +39,8 @@ class AllianceGiftsRoutine(FlexibleRoutine):
             tap=True,
             error_msg="No claim all button found"
         ):
-            # Clear claim message
-            controls.human_delay(2)
-            controls.device.press_back()
-            controls.human_delay(1)
+            # Clear claim message, no decision in between so it runs in one go on the device
+            controls.device.run_gestures(GestureBatch().sleep(2).back().sleep(1))
         
         # Open premium tab
         if not controls.find_template(
@@ -51,7 +50,7 @@ class AllianceGiftsRoutine(FlexibleRoutine):
         ):
             return True
         
-        controls.human_delay('menu_animation')
+        controls.human_delay('menu_animation', settle=True)
 
         # Click collect all button
         controls.find_template(
@@ -159,15 +159,11 @@ class CheckForDigsRoutine(FlexibleRoutine):
         
         controls.human_delay(CONFIG['timings']['menu_animation'])
 
-        if not (controls.find_template(
-            "squad_idle",
+        if not controls.find_any(
+            ["squad_idle", "squad_returning"],
             tap=True,
             tap_offset=(20, 10),
-        ) or controls.find_template(
-            "squad_returning",
-            tap=True,
-            tap_offset=(20, 10),
-        )):
+        ):
             return True
         
         if not controls.find_template(
@@ -203,11 +199,18 @@ class CheckForDigsRoutine(FlexibleRoutine):
             DELAY = 0
             OFFSET_Y = 20
 
-            controls.device.spam_click(coords_00[0], coords_00[1] + OFFSET_Y, duration=DURATION, delay=DELAY)
+            burst = controls.device.spam_click(
+                coords_00[0], coords_00[1] + OFFSET_Y, duration=DURATION, delay=DELAY,
+                # No point tapping on once the dig is taken
+                stop_condition=lambda: bool(controls.find_template(
+                    "dig_claimed_already",
+                    file_name_getter=lambda file_name, success, template_name: None,
+                )),
+            )
 
             self.unclaimed_dig_type = None
 
-            if controls.find_template(
+            if burst.stopped or controls.find_template(
                 "dig_claimed_already",
                 wait=2,
             ):
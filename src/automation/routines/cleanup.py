@@ -1,4 +1,5 @@
 from src.automation.routines import FlexibleRoutine
+from src.core.image_processing import log_match_stats
 from src.game import controls
 
 class CleanupRoutine(FlexibleRoutine):
@@ -9,4 +10,6 @@ class CleanupRoutine(FlexibleRoutine):
     def _execute_internal(self) -> bool:
         controls.device.cleanup_temp_files()
         controls.device.cleanup_device_screenshots()
+        controls.device.log_performance_stats()
+        log_match_stats()
         return True 
\ No newline at end of file
@@ -73,15 +73,11 @@ class RallyRoutine(FlexibleRoutine):
                 ):
                     continue
             else:
-                if not (controls.find_template(
-                    "squad_idle",
+                if not controls.find_any(
+                    ["squad_idle", "squad_returning"],
                     tap=True,
                     tap_offset=(20, 10),
-                ) or controls.find_template(
-                    "squad_returning",
-                    tap=True,
-                    tap_offset=(20, 10),
-                )):
+                ):
                     continue
 
             if not controls.find_template(
@@ -176,9 +176,6 @@ class SecretaryRoutine(FlexibleRoutine):
                     if len(CONTROL_LIST['whitelist']['alliance']) > 0:
                         current_screenshot = controls.device.take_screenshot()
 
-                        if not current_screenshot:
-                            break
-
                         if current_screenshot is None:
                             break
 
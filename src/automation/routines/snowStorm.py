@@ -108,19 +108,13 @@ class SnowStorm(FlexibleRoutine):
         controls.device.swipe(start=("10%", "32%"), end=("10%", "82%"))
 
     def open_furnace(self) -> bool:
-        if not (controls.find_template(
-            "s2_furnace_on_model",
+        if not controls.find_any(
+            ["s2_furnace_on_model", "s2_furnace_off_model"],
             tap=True,
             wait=2,
             interval=0.5,
-            error_msg=f"Could not find 's2_furnace_on_model' "
-        ) or controls.find_template(
-            "s2_furnace_off_model",
-            tap=True,
-            wait=2,
-            interval=0.5,
-            error_msg=f"Could not find 's2_furnace_off_model' "
-        )):
+            error_msg=f"Could not find 's2_furnace_on_model' or 's2_furnace_off_model' "
+        ):
             return False
         
         if not controls.find_template(
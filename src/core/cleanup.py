@@ -35,6 +35,7 @@ class CleanupManager:
             
         try:
             app_logger.info("Running cleanup tasks...")
+            controls.device.stop_frame_stream()
             controls.device.cleanup_temp_files()
             controls.device.cleanup_device_screenshots()
         except Exception as e:
@@ -72,7 +72,14 @@ class ConfigManager:
             "host": "",
             "port": -1,
             "binary_path": "adb",
-            "enforce_connection": False
+            "enforce_connection": False,
+            "capture_mode": "auto",
+            "capture_benchmark_runs": 3,
+            "transport": "adb_shell",
+            "transport_timeout": 10.0,
+            "package_state_ttl": 5.0,
+            "orientation_ttl": 2.0,
+            "input_backend": "sendevent"
         })
 
 
@@ -14,6 +14,8 @@ def save_debug_region(region: Tuple[int, int, int, int], prefix: str):
         img = _take_and_load_screenshot()
         if img is None:
             return
+        # Frames can be shared with other readers, never draw on them in place
+        img = img.copy()
             
         x1, y1, x2, y2 = region
         
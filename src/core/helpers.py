@@ -1,6 +1,9 @@
+from collections import deque
 from datetime import datetime, UTC
 import time
 from functools import wraps
+from threading import Lock
+from typing import Deque, Dict, List
 from zoneinfo import ZoneInfo
 from pathlib import Path
 
@@ -53,4 +56,55 @@ def throttle(seconds: float):
                 # Discard the call by returning None
                 return None
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+class LatencyStats:
+    """
+    Collects per-key latency samples (in seconds) and reports count, average
+    and percentiles. Only the last `max_samples` samples per key are kept.
+    """
+    def __init__(self, max_samples: int = 500):
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def record(self, key: str, elapsed: float) -> None:
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.max_samples)
+                self._counts[key] = 0
+            self._samples[key].append(elapsed)
+            self._counts[key] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns {key: {count, avg_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        with self._lock:
+            snapshot = {key: (self._counts[key], sorted(samples)) for key, samples in self._samples.items()}
+
+        report = {}
+        for key, (count, samples) in snapshot.items():
+            if not samples:
+                continue
+            report[key] = {
+                "count": count,
+                "avg_ms": sum(samples) / len(samples) * 1000,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": samples[-1] * 1000,
+            }
+        return report
+
+    def format_summary(self) -> str:
+        return "; ".join(
+            f"{key}: n={s['count']} avg={s['avg_ms']:.1f}ms p95={s['p95_ms']:.1f}ms"
+            for key, s in self.summary().items()
+        )
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = max(0, min(len(sorted_samples) - 1, int(round(pct / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
@@ -3,50 +3,201 @@
 import cv2
 import numpy as np
 import time
-from typing import Callable, Optional, Tuple
-import os
+import zlib
+from collections import OrderedDict, deque
+from threading import Event, Lock, local
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
 import concurrent.futures
 
 from src.game.device import device
+from .helpers import LatencyStats
 from .logging import app_logger
 from .config import CONFIG
+from .spatial_priors import spatial_priors
+from .template_registry import CompiledTemplate, convert_to_mode, template_registry
 
 file_save_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-template_img_hash = {}
+# Captures frames ahead of the matcher in pipelined waits, see `capture.pipeline`
+capture_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+match_stats = LatencyStats()
+
+# (x, y, confidence) of one template match, in screen coordinates
+ScoredMatch = Tuple[int, int, float]
+PollResult = TypeVar("PollResult")
+
+# Coarse candidates re-matched at full resolution per template in pyramid mode
+PYRAMID_MAX_CANDIDATES = 20
+# Smallest downscaled template side that still matches reliably
+PYRAMID_MIN_TEMPLATE_SIDE = 8
+
+# Last matched frame and its conversions per match mode, replaced as a whole
+_mode_frames: Tuple[Optional[np.ndarray], Dict[str, np.ndarray]] = (None, {})
+# Rows of a frame hashed for its fingerprint: every n-th, whole rows are contiguous
+# and cheap to gather. A change has to be at least this tall to change the fingerprint
+FINGERPRINT_ROW_STRIDE = 4
+# Last fingerprinted frame and its fingerprint
+_frame_fingerprints: Tuple[Optional[np.ndarray], int] = (None, 0)
+
+class MatchCache:
+    """
+    Bounded LRU of match results keyed by frame fingerprint, template and
+    search parameters, so matching an unchanged screen again (a retry loop,
+    a re-check of a button just found) is a lookup. Holds at most
+    `max_entries` results, entries older than `max_age` seconds are misses.
+    """
+    def __init__(self, enabled: bool = True, max_entries: int = 256, max_age: float = 30.0):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[tuple, Tuple[float, list[ScoredMatch]]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[list[ScoredMatch]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.max_age:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: tuple, matches: list[ScoredMatch]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), list(matches))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def format_stats(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} ({self.hit_rate:.0%} hit rate) "
+            f"evictions={self.evictions} entries={len(self._entries)}"
+        )
+
+class IncrementalMatch:
+    """
+    Result map of one template kept across the frames of a wait. Each frame
+    is hashed in `tile` pixel tiles (CRC32) and compared with the previous
+    frame's hashes, and only the part of the map that sees a changed tile
+    (the tiles plus a template-sized margin) is recomputed; a frame with more
+    than `max_dirty` of its tiles changed is matched in full.
+
+    Only the hashes of the previous frame are kept, never the frame: stream
+    frames can be views into buffers that are overwritten in place.
+    """
+    # Totals over all waits, for log_match_stats
+    frames = 0
+    tiles = 0
+    dirty_tiles = 0
+
+    def __init__(self, tile: int = 64, max_dirty: float = 0.5):
+        self.tile = tile
+        self.max_dirty = max_dirty
+        self._hashes: Optional[np.ndarray] = None
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._result: Optional[np.ndarray] = None
+
+    def result(self, img: np.ndarray, template: CompiledTemplate, threshold: float) -> np.ndarray:
+        previous, self._hashes = self._hashes, self._tile_hashes(img)
+        if previous is None or self._shape != img.shape:
+            self._shape = img.shape
+            self._result = _match_result(img, template, threshold)
+            return self._result
+
+        dirty = self._hashes != previous
+        IncrementalMatch.frames += 1
+        IncrementalMatch.tiles += dirty.size
+        IncrementalMatch.dirty_tiles += int(np.count_nonzero(dirty))
+        if not dirty.any():
+            return self._result
+        if np.count_nonzero(dirty) > self.max_dirty * dirty.size:
+            self._result = _match_result(img, template, threshold)
+            return self._result
+
+        h, w = template.image.shape[:2]
+        rows, cols = self._result.shape
+        _, _, boxes, _ = cv2.connectedComponentsWithStats(dirty.view(np.uint8), connectivity=8)
+        for x, y, width, height, _ in boxes[1:]:
+            # Result pixels whose template window overlaps the changed tiles
+            y1, y2 = max(0, y * self.tile - h + 1), min(rows, (y + height) * self.tile)
+            x1, x2 = max(0, x * self.tile - w + 1), min(cols, (x + width) * self.tile)
+            if y1 < y2 and x1 < x2:
+                self._result[y1:y2, x1:x2] = _correlate(img[y1:y2 + h - 1, x1:x2 + w - 1], template.image, template.mask)
+        return self._result
+
+    def _tile_hashes(self, img: np.ndarray) -> np.ndarray:
+        """CRC32 per tile, as a grid"""
+        height, width = img.shape[:2]
+        return np.array([
+            [zlib.crc32(np.ascontiguousarray(img[y:y + self.tile, x:x + self.tile])) for x in range(0, width, self.tile)]
+            for y in range(0, height, self.tile)
+        ], dtype=np.uint32)
+
+    @classmethod
+    def format_stats(cls) -> str:
+        share = cls.dirty_tiles / cls.tiles if cls.tiles else 0.0
+        return f"frames={cls.frames} recomputed tiles={share:.1%}"
+
+# Result maps of the wait running on this thread, see `_poll_frames`
+_incremental = local()
+
+match_cache = MatchCache(
+    CONFIG.get('match_cache.enabled', False),
+    CONFIG.get('match_cache.max_entries', 256),
+    CONFIG.get('match_cache.max_age', 30.0),
+)
 
 def _load_template(template_name: str) -> Tuple[Optional[np.ndarray], Optional[dict]]:
     """Load template and its config"""
-    env = CONFIG["env"]
-    template_config = CONFIG.get(f"templates.{template_name}")
-        
-    if not template_config:
-        app_logger.error(f"Template {template_name} not found in config")
+    template = template_registry.get(template_name)
+    if template is None:
         return None, None
-    
-    template_path = template_config['path'].format(env=env)
+    return template.image, template.config
 
-    # Look for a file in {env} folder, if missing use {default}
-    if not os.path.exists(f"config/{template_path}"):
-        env = "default"
-        template_path = template_config['path'].format(env=env)
-        
-    # Get the template from the cache, or load it if not present
-    template = template_img_hash.get(template_path)
-    if template is None:
-        app_logger.debug(f"Not found template in hash, reading: config/{template_path}")
+def _frame_in_mode(img: np.ndarray, mode: str) -> np.ndarray:
+    """`img` converted to `mode`, converted once per frame and shared by all templates using the mode"""
+    global _mode_frames
+    if mode == 'bgr':
+        return img
 
-        template = cv2.imread(f"config/{template_path}")
-        template_img_hash[template_path] = template
+    frame, converted = _mode_frames
+    if frame is not img:
+        converted = {}
+        _mode_frames = (img, converted)
+    if mode not in converted:
+        started_at = time.time()
+        converted[mode] = convert_to_mode(img, mode)
+        match_stats.record("convert", time.time() - started_at)
+    return converted[mode]
 
-    if template is None:
-        app_logger.error(f"Failed to load template: config/{template_path}")
-        return None, None
-        
-    return template, template_config
+def _frame_fingerprint(img: np.ndarray) -> int:
+    """CRC32 of every `FINGERPRINT_ROW_STRIDE`-th row of the frame, computed once per frame object"""
+    global _frame_fingerprints
+    frame, fingerprint = _frame_fingerprints
+    if frame is not img:
+        started_at = time.time()
+        fingerprint = zlib.crc32(np.ascontiguousarray(img[::FINGERPRINT_ROW_STRIDE]).data)
+        match_stats.record("fingerprint", time.time() - started_at)
+        _frame_fingerprints = (img, fingerprint)
+    return fingerprint
 
-def _take_and_load_screenshot() -> Optional[np.ndarray]:
-    """Take and load a screenshot"""
-    return device.take_screenshot()
+def _take_and_load_screenshot(region: Tuple[int, int, int, int] = None) -> Optional[np.ndarray]:
+    """Take and load a screenshot, only the (x1, y1, x2, y2) band if `region` is given"""
+    return device.take_screenshot(region=region)
 
 def _save_debug_image_blocking(
     img: np.ndarray, 
@@ -120,71 +271,198 @@ def _save_debug_image(
     )
 
 def _get_templates_coords(
-    template_name: str,
+    template_name: str | list[str],
     search_region: Tuple[int, int, int, int] = None,
     file_name_getter = None,
     find_one: bool = False,
 ) -> list[Tuple[int, int]]:
-    """Find all template matches in image and return center coordinates"""
+    """Find all template matches in image and return center coordinates.
+    With a list of templates, the matches of the first one found on the same frame"""
     try:
-        app_logger.debug(f"Looking for template: '{template_name}'")
-        
-        template, template_config = _load_template(template_name)
-        if template is None:
-            app_logger.debug(f"Failed to load template: '{template_name}'")
-            return []
-            
-        h, w = template.shape[:2]
-        
-        img = _take_and_load_screenshot()
+        img = _take_and_load_screenshot(search_region)
         if img is None:
             app_logger.debug("Failed to load screenshot")
             return []
+
+        return _first_template_coords(img, template_name, search_region, file_name_getter, find_one)
+
+    except Exception as e:
+        app_logger.error(f"Error finding templates: {e}")
+        return []
+
+def _first_template_coords(
+    img: np.ndarray,
+    template_name: str | list[str],
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+) -> list[Tuple[int, int]]:
+    """Matches of the first template (in list order) found on the `search_region` band `img`"""
+    template_name_list = template_name if isinstance(template_name, list) else [template_name]
+    for tmp in template_name_list:
+        coords_list = _match_template(img, tmp, search_region, file_name_getter, find_one, frame_is_region=True)
+        if coords_list:
+            return coords_list
+    return []
+
+def _match_templates(
+    img: np.ndarray,
+    template_names: list[str],
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+    stop_at_first: bool = False,
+) -> Dict[str, list[ScoredMatch]]:
+    """Scored matches of every template on the `search_region` band `img`, in list order.
+    With `stop_at_first` the templates after the first one found are not matched."""
+    results = {}
+    for tmp in template_names:
+        results[tmp] = _match_template_scored(img, tmp, search_region, file_name_getter, find_one, frame_is_region=True)
+        if stop_at_first and results[tmp]:
+            break
+    return results
+
+def _match_template(
+    img: np.ndarray,
+    template_name: str,
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+    frame_is_region: bool = False,
+) -> list[Tuple[int, int]]:
+    """Find all template matches in the given frame and return center coordinates.
+    With `frame_is_region` the frame is already the `search_region` band."""
+    matches = _match_template_scored(img, template_name, search_region, file_name_getter, find_one, frame_is_region)
+    return [(x, y) for x, y, _ in matches]
+
+def _match_template_scored(
+    img: np.ndarray,
+    template_name: str,
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+    frame_is_region: bool = False,
+) -> list[ScoredMatch]:
+    """Same as `_match_template`, with the confidence of each match"""
+    app_logger.debug(f"Looking for template: '{template_name}'")
+
+    template = template_registry.get(template_name)
+    if template is None:
+        app_logger.debug(f"Failed to load template: '{template_name}'")
+        return []
+
+    if not match_cache.enabled:
+        return _search_template(img, template, search_region, file_name_getter, find_one, frame_is_region)
+
+    key = (
+        _frame_fingerprint(img), img.shape, template_name, search_region, frame_is_region, find_one,
+        template.threshold, template.pyramid,
+    )
+    matches = match_cache.get(key)
+    if matches is None:
+        matches = _search_template(img, template, search_region, file_name_getter, find_one, frame_is_region)
+        match_cache.put(key, matches)
+    return matches
+
+def _search_template(
+    img: np.ndarray,
+    template: CompiledTemplate,
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+    frame_is_region: bool = False,
+) -> list[ScoredMatch]:
+    """Matches of a template in its configured region, or its learned positions before the full frame"""
+    template_name = template.name
+    h, w = template.image.shape[:2]
+    if template.config.get('region'):
+        # A band frame is smaller than the screen the region is relative to
+        band = frame_is_region and search_region
+        screen_size = device.get_screen_size() if band else (img.shape[1], img.shape[0])
+        x1, y1, x2, y2 = template.region(screen_size)
+        if search_region:
+            x1, y1 = max(x1, search_region[0]), max(y1, search_region[1])
+            x2, y2 = min(x2, search_region[2]), min(y2, search_region[3])
+            if x2 - x1 < w or y2 - y1 < h:
+                app_logger.debug(f"Search region {search_region} is outside the region of '{template_name}'")
+                return []
+        if band:
+            # Crop the band to the region here, matches are then relative to the crop
+            img = img[y1 - search_region[1]:y2 - search_region[1], x1 - search_region[0]:x2 - search_region[0]]
+        else:
+            # A full frame, cropped to the region by the matcher
+            frame_is_region = False
+        search_region = (x1, y1, x2, y2)
+
+    full_frame = not search_region and spatial_priors.enabled
+    region = None
+    if full_frame and find_one:
+        region = spatial_priors.region(template_name, img.shape, (w, h))
+
+    started_at = time.time()
+    if region is not None:
+        # A miss here isn't a failure yet, only successful region searches save debug images
+        def region_file_name(file_name: str, success: bool, name: str) -> Optional[str]:
+            if not success:
+                return None
+            return file_name_getter(file_name, success, name) if file_name_getter else file_name
+
+        matches = _match_template_in(img, template, region, region_file_name, find_one)
+        if matches:
+            spatial_priors.record_hit(template_name, time.time() - started_at)
+            spatial_priors.learn(template_name, img.shape, matches)
+            return matches
+        spatial_priors.record_fallback(time.time() - started_at)
+        started_at = time.time()
+
+    matches = _match_template_in(img, template, search_region, file_name_getter, find_one, frame_is_region)
+    if full_frame:
+        spatial_priors.record_full(template_name, time.time() - started_at)
+        spatial_priors.learn(template_name, img.shape, matches)
+    return matches
+
+def _match_template_in(
+    img: np.ndarray,
+    template: CompiledTemplate,
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+    frame_is_region: bool = False,
+) -> list[ScoredMatch]:
+    """Scored matches of a loaded template, in `search_region` of `img` if given"""
+    template_name = template.name
+    try:
+        h, w = template.image.shape[:2]
             
         app_logger.debug(f"Screenshot loaded successfully. Shape: {img.shape}")
 
         # Get region to search
-        if search_region:
+        img_region = _frame_in_mode(img, template.mode)
+        if search_region and not frame_is_region:
             x1, y1, x2, y2 = search_region
-            img_region = img[y1:y2, x1:x2]
-        else:
-            img_region = img
+            img_region = img_region[y1:y2, x1:x2]
             
-        result = cv2.matchTemplate(img_region, template, cv2.TM_CCOEFF_NORMED)
-        threshold = template_config.get('threshold', CONFIG['match_threshold'])
+        threshold = template.threshold
+        match_started_at = time.time()
+        incremental_maps = getattr(_incremental, 'maps', None)
+        if incremental_maps is not None:
+            key = (template_name, search_region, frame_is_region)
+            if key not in incremental_maps:
+                settings = CONFIG['incremental_match']
+                incremental_maps[key] = IncrementalMatch(settings.get('tile', 64), settings.get('max_dirty', 0.5))
+            result = incremental_maps[key].result(img_region, template, threshold)
+        else:
+            result = _match_result(img_region, template, threshold)
+        match_stats.record("match", time.time() - match_started_at)
             
-        matches = []
         failed_max_val = None
         failed_matches = []
-        result_copy = result.copy()
-        
-        while True:
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result_copy)
-            
-            # Store match with confidence
-            center_x = max_loc[0] + w//2
-            center_y = max_loc[1] + h//2
-
-            app_logger.debug(f"Match values - Max: {max_val:.4f}, Min: {min_val:.4f}, Threshold: {threshold}")
-            app_logger.debug(f"Match location - Max: {max_loc}, Min: {min_loc}")
-
-            if max_val < threshold:
-                failed_max_val = max_val
-                failed_matches.append((center_x, center_y, max_val))
-                break
-                
-            app_logger.debug(f"Match value {max_val:.4f} EXCEEDS threshold {threshold} !")
-            matches.append((center_x, center_y, max_val))
+        peaks = _extract_peaks(result, threshold, (w, h), find_one)
+        matches = [(x + w//2, y + h//2, score) for x, y, score in peaks]
 
-            if (find_one):
-                break
-            
-            # Suppress region
-            x1_sup = max(0, max_loc[0] - w//2)
-            y1_sup = max(0, max_loc[1] - h//2)
-            x2_sup = min(result_copy.shape[1], max_loc[0] + w//2)
-            y2_sup = min(result_copy.shape[0], max_loc[1] + h//2)
-            result_copy[y1_sup:y2_sup, x1_sup:x2_sup] = 0
+        if not matches:
+            _, failed_max_val, _, max_loc = cv2.minMaxLoc(result)
+            failed_matches.append((max_loc[0] + w//2, max_loc[1] + h//2, failed_max_val))
         
         # Adjust coordinates if search region was used
         adjusted_matches = []
@@ -193,14 +471,17 @@ def _get_templates_coords(
             if search_region:
                 x += search_region[0]
                 y += search_region[1]
-            adjusted_matches.append((x, y))
+            adjusted_matches.append((x, y, coef))
 
         if failed_matches and not matches:
             success = False
             app_logger.debug(f"Match value {failed_max_val:.4f} below threshold {threshold}")
             
         # Save debug image
-        _save_debug_image(img, template_name, matches or failed_matches, search_region, success=success, file_name_getter=file_name_getter)
+        _save_debug_image(
+            img, template_name, matches or failed_matches, None if frame_is_region else search_region,
+            success=success, file_name_getter=file_name_getter,
+        )
 
         app_logger.debug(f"Found {len(matches)} matches for '{template_name}' with threshold {threshold}")
         return adjusted_matches
@@ -208,7 +489,87 @@ def _get_templates_coords(
     except Exception as e:
         app_logger.error(f"Error finding templates: {e}")
         return []
-    
+
+def _extract_peaks(result: np.ndarray, threshold: float, template_size: Tuple[int, int], find_one: bool = False) -> list[ScoredMatch]:
+    """
+    (x, y, score) of the peaks in a result map scoring at least `threshold`,
+    best first. Candidates are the local maxima (3x3) above the threshold, a
+    candidate within half a template size of a better accepted one is
+    suppressed. The map is left untouched.
+    """
+    if find_one:
+        _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+        return [(x, y, max_val)] if max_val >= threshold else []
+
+    ys, xs = np.nonzero(result >= threshold)
+    if not len(ys):
+        return []
+
+    # Local maxima, dilating only the box around the pixels above the threshold
+    y1, x1 = max(ys.min() - 1, 0), max(xs.min() - 1, 0)
+    window = result[y1:ys.max() + 2, x1:xs.max() + 2]
+    local_max = cv2.dilate(window, np.ones((3, 3), np.uint8))
+    scores = result[ys, xs]
+    peak = scores >= local_max[ys - y1, xs - x1]
+    ys, xs, scores = ys[peak], xs[peak], scores[peak]
+
+    w, h = template_size
+    order = np.argsort(-scores, kind='stable')
+    accepted_x, accepted_y, peaks = [], [], []
+    for i in order:
+        x, y = xs[i], ys[i]
+        if accepted_x:
+            dx = x - np.array(accepted_x)
+            dy = y - np.array(accepted_y)
+            if np.any((dx >= -(w // 2)) & (dx < w // 2) & (dy >= -(h // 2)) & (dy < h // 2)):
+                continue
+        accepted_x.append(x)
+        accepted_y.append(y)
+        peaks.append((int(x), int(y), float(scores[i])))
+    return peaks
+
+def _correlate(img: np.ndarray, template: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """TM_CCOEFF_NORMED map, masked templates score windows that divide by zero as -1"""
+    if mask is None:
+        return cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED)
+    result = cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+    return np.nan_to_num(result, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+
+def _match_result(img: np.ndarray, template: CompiledTemplate, threshold: float) -> np.ndarray:
+    """
+    TM_CCOEFF_NORMED result map of `template` over `img`. With a `pyramid`
+    factor, frame and template are matched downscaled by it first, and only
+    windows around the coarse candidates are matched at full resolution.
+    Scores outside those windows are left at -1, so the peak search and
+    suppression work on the map as usual.
+    """
+    pyramid = template.pyramid
+    h, w = template.image.shape[:2]
+    if not pyramid or pyramid <= 1 or min(h, w) // pyramid < PYRAMID_MIN_TEMPLATE_SIDE:
+        return _correlate(img, template.image, template.mask)
+
+    small_template, small_mask = template.level(pyramid)
+    small_img = cv2.resize(img, None, fx=1 / pyramid, fy=1 / pyramid, interpolation=cv2.INTER_AREA)
+    coarse = _correlate(small_img, small_template, small_mask)
+
+    # Downscaling blurs both, true matches score lower on the coarse level
+    coarse_threshold = threshold - CONFIG.get('pyramid_margin', 0.15)
+    sh, sw = small_template.shape[:2]
+    result = np.full((img.shape[0] - h + 1, img.shape[1] - w + 1), -1.0, dtype=np.float32)
+    for _ in range(PYRAMID_MAX_CANDIDATES):
+        _, max_val, _, (cx, cy) = cv2.minMaxLoc(coarse)
+        if max_val < coarse_threshold:
+            break
+        coarse[max(0, cy - sh // 2):cy + sh // 2 + 1, max(0, cx - sw // 2):cx + sw // 2 + 1] = -1
+
+        # Full resolution window covering the rounding error of the coarse position
+        x1, y1 = max(0, (cx - 1) * pyramid), max(0, (cy - 1) * pyramid)
+        x2, y2 = min(result.shape[1], (cx + 2) * pyramid), min(result.shape[0], (cy + 2) * pyramid)
+        if x1 >= x2 or y1 >= y2:
+            continue
+        result[y1:y2, x1:x2] = _correlate(img[y1:y2 + h - 1, x1:x2 + w - 1], template.image, template.mask)
+    return result
+
 def _wait_for_image(
     template_name: str | list[str],
     wait: float = 120.0,
@@ -216,20 +577,202 @@ def _wait_for_image(
     search_region: Tuple[int, int, int, int] = None,
     file_name_getter = None,
     find_one: bool = False,
+    pipelined: bool = None,
 ) -> Optional[list[Tuple[int, int]]]:
-    """Wait for template to appear in screenshot"""
+    """Wait for template to appear in screenshot, all templates of a list are matched on each frame"""
+    coords_list = _poll_frames(
+        lambda img: _first_template_coords(img, template_name, search_region, file_name_getter, find_one) or None,
+        wait, interval, search_region, pipelined,
+    )
+    return coords_list or []
+
+def _poll_frames(
+    match_frame: Callable[[np.ndarray], Optional[PollResult]],
+    wait: float,
+    interval: float,
+    search_region: Tuple[int, int, int, int] = None,
+    pipelined: bool = None,
+) -> Optional[PollResult]:
+    """
+    Run `match_frame` on one frame per `interval` until it returns something or `wait` runs out.
+    With `incremental_match.enabled` the result maps of a frame are updated for the next one
+    instead of being recomputed, see IncrementalMatch.
+    """
     if not interval:
         interval = 1.0
+    if pipelined is None:
+        pipelined = CONFIG['capture'].get('pipeline', False)
+
+    outer_maps = getattr(_incremental, 'maps', None)
+    if CONFIG['incremental_match'].get('enabled', False):
+        _incremental.maps = {}
+    try:
+        # A frame stream already captures in the background, nothing to pipeline
+        if pipelined and not device.is_streaming:
+            return _poll_frames_pipelined(match_frame, wait, interval, search_region)
+        return _poll_frames_serial(match_frame, wait, interval, search_region)
+    finally:
+        _incremental.maps = outer_maps
+
+def _poll_frames_serial(
+    match_frame: Callable[[np.ndarray], Optional[PollResult]],
+    wait: float,
+    interval: float,
+    search_region: Tuple[int, int, int, int] = None,
+) -> Optional[PollResult]:
     start_time = time.time()
-    template_name_list = template_name if isinstance(template_name, list) else [template_name]
     while time.time() - start_time < wait:
-        coords_list = []
-        for tmp in template_name_list:
-            coords_list = _get_templates_coords(tmp, search_region, file_name_getter, find_one)
-            if coords_list:
-                return coords_list
-        time.sleep(interval)
-    return []
+        poll_started_at = time.time()
+        img = _take_and_load_screenshot(search_region)
+        if img is not None:
+            result = match_frame(img)
+            if result is not None:
+                return result
+        match_stats.record("wait_serial_poll", time.time() - poll_started_at)
+        # Sleeps `interval`, or wakes up early once a newer streamed frame arrives
+        device.wait_for_new_frame(interval)
+    return None
+
+def _poll_frames_pipelined(
+    match_frame: Callable[[np.ndarray], Optional[PollResult]],
+    wait: float,
+    interval: float,
+    search_region: Tuple[int, int, int, int] = None,
+) -> Optional[PollResult]:
+    """
+    Same as the serial poll loop, but frame N+1 is captured on `capture_executor`
+    while frame N is matched. Captures start `interval` apart and at most
+    `capture.pipeline_depth` of them are queued; everything still pending is
+    cancelled on the first hit or when `wait` runs out.
+    """
+    depth = max(1, CONFIG['capture'].get('pipeline_depth', 2))
+    start_time = time.time()
+    deadline = start_time + wait
+    cancelled = Event()
+    pending: Deque[concurrent.futures.Future] = deque()
+    next_capture_at = start_time
+
+    def capture(not_before: float, fresh: bool) -> Tuple[Optional[np.ndarray], float]:
+        delay = not_before - time.time()
+        if delay > 0 and cancelled.wait(delay):
+            return None, 0.0
+        if cancelled.is_set():
+            return None, 0.0
+        started_at = time.time()
+        return device.take_screenshot(fresh=fresh, region=search_region), started_at
+
+    try:
+        while time.time() < deadline:
+            while len(pending) < depth and next_capture_at < deadline:
+                # Only the first frame may come from the frame cache
+                pending.append(capture_executor.submit(capture, next_capture_at, next_capture_at > start_time))
+                next_capture_at += interval
+            if not pending:
+                break
+
+            poll_started_at = time.time()
+            try:
+                img, capture_started_at = pending.popleft().result(timeout=max(0.0, deadline - poll_started_at))
+            except concurrent.futures.TimeoutError:
+                break
+            if img is None:
+                continue
+
+            # Count only the capture time not hidden behind matching, not the pacing delay
+            blocked_from = max(poll_started_at, capture_started_at)
+            result = match_frame(img)
+            if result is not None:
+                return result
+            match_stats.record("wait_pipelined_poll", time.time() - blocked_from)
+        return None
+    finally:
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+
+def find_all(
+    template_names: list[str],
+    wait: float = None,
+    interval: float = None,
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+    find_one: bool = False,
+) -> Dict[str, list[ScoredMatch]]:
+    """
+    Match every template against the same frame, returns the scored matches
+    per template (empty lists for templates not found). With `wait`, frames
+    are polled until at least one template is found, one capture per tick
+    for the whole set.
+    """
+    def match_frame(img: np.ndarray) -> Optional[Dict[str, list[ScoredMatch]]]:
+        results = _match_templates(img, template_names, search_region, file_name_getter, find_one)
+        return results if any(results.values()) else None
+
+    results = None
+    if wait:
+        results = _poll_frames(match_frame, wait, interval, search_region)
+    else:
+        img = _take_and_load_screenshot(search_region)
+        if img is not None:
+            results = _match_templates(img, template_names, search_region, file_name_getter, find_one)
+    return results or {tmp: [] for tmp in template_names}
+
+def find_any(
+    template_names: list[str],
+    error_msg: Optional[str] = None,
+    success_msg: Optional[str] = None,
+    critical: bool = False,
+    wait: float = None,
+    interval: float = None,
+    tap: bool = False,
+    tap_duration: float = None,
+    tap_offset: Tuple[int, int] = (0, 0),
+    search_region: Tuple[int, int, int, int] = None,
+    file_name_getter = None,
+) -> Optional[Tuple[str, ScoredMatch]]:
+    """
+    Find the first of `template_names` (in list order) on one frame, polling
+    one frame per tick for the whole set with `wait`. Returns the template
+    name and its best (x, y, confidence) match, tapped with `tap`.
+    """
+    def match_frame(img: np.ndarray) -> Optional[Tuple[str, ScoredMatch]]:
+        results = _match_templates(img, template_names, search_region, file_name_getter, find_one=True, stop_at_first=True)
+        return next(((tmp, matches[0]) for tmp, matches in results.items() if matches), None)
+
+    if wait:
+        found = _poll_frames(match_frame, wait, interval, search_region)
+    else:
+        img = _take_and_load_screenshot(search_region)
+        found = match_frame(img) if img is not None else None
+
+    if found is None:
+        if error_msg:
+            if critical:
+                app_logger.error(error_msg)
+            else:
+                app_logger.info(error_msg)
+        return None
+
+    if success_msg:
+        app_logger.info(success_msg)
+
+    if tap:
+        x, y, _ = found[1]
+        click_kwargs = {'duration': tap_duration} if tap_duration is not None else {}
+        device.click(x + tap_offset[0], y + tap_offset[1], **click_kwargs)
+    return found
+
+def log_match_stats() -> None:
+    """Log template matching and wait loop timings, match cache, incremental matching and spatial prior results"""
+    if match_stats.summary():
+        app_logger.info(f"Template matching: {match_stats.format_summary()}")
+    if match_cache.enabled:
+        app_logger.info(f"Match cache: {match_cache.format_stats()}")
+    if IncrementalMatch.frames:
+        app_logger.info(f"Incremental matching: {IncrementalMatch.format_stats()}")
+    if spatial_priors.enabled:
+        app_logger.info(f"Spatial priors: {spatial_priors.format_stats()}")
+        spatial_priors.save()
 
 def compare_screenshots(img1: np.ndarray, img2: np.ndarray) -> bool:
     """
@@ -261,11 +804,15 @@ def find_templates(
     search_region: Tuple[int, int, int, int] = None,
     file_name_getter: Callable[[str, bool], str] = None,
     find_one: bool = False,
+    tap_verify: bool = False,
 ) -> list[Tuple[int, int]]:
-    """Find and tap a template on screen"""
+    """Find and tap a template on screen. With `tap_verify` the tap is checked
+    (and repeated once) by watching the template's box change, nothing is
+    returned if the tap had no visible effect"""
     if wait:
         locations = _wait_for_image(
-            template_name, file_name_getter=file_name_getter, find_one=find_one, wait=wait, interval=interval, 
+            template_name, file_name_getter=file_name_getter, find_one=find_one, wait=wait, interval=interval,
+            search_region=search_region,
         )
     else:
         locations = _get_templates_coords(
@@ -294,9 +841,19 @@ def find_templates(
 
     if tap_duration is not None:
         click_kwargs['duration'] = tap_duration
+
+    if tap_verify:
+        click_kwargs['verify'] = True
+        if isinstance(template_name, str):
+            template, _ = _load_template(template_name)
+            if template is not None:
+                h, w = template.shape[:2]
+                x1, y1 = location[0] - w // 2, location[1] - h // 2
+                click_kwargs['verify_region'] = (max(x1, 0), max(y1, 0), x1 + w, y1 + h)
         
     # Unpack the dictionary into the function call
-    device.click(coors[0], coors[1], **click_kwargs)
+    if device.click(coors[0], coors[1], **click_kwargs) is False:
+        return []
         
     return locations
 
@@ -0,0 +1,168 @@
+"""Where templates were found before, to search there first"""
+
+import json
+import os
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import CONFIG
+from .logging import app_logger
+
+# Bumped whenever the saved layout changes
+PRIORS_VERSION = 1
+# Weight of the newest full frame match time in its running average
+FULL_TIME_SMOOTHING = 0.2
+
+
+class SpatialPriors:
+    """
+    Per template heatmap of match centers on a grid of `cell` pixel cells,
+    learned from full frame matches and saved to `path` across runs.
+
+    `region` is the bounding box of the cells holding at least `min_share` of
+    the hits (so rare outliers don't widen it), padded by the template size
+    plus `padding`, once a template has `min_hits` hits and as
+    long as the box covers at most `max_area` of the frame. Single match
+    lookups search that region first and the full frame only when it misses.
+    """
+    def __init__(self):
+        settings = CONFIG['spatial_priors']
+        self.enabled = settings.get('enabled', False)
+        self.path = settings.get('path', "state/spatial_priors.json")
+        self.cell = settings.get('cell', 40)
+        self.padding = settings.get('padding', 40)
+        self.min_hits = settings.get('min_hits', 3)
+        self.max_area = settings.get('max_area', 0.5)
+        self.min_share = settings.get('min_share', 0.05)
+        self.save_every = settings.get('save_every', 50)
+
+        # {template: (frame (height, width), hit counts per cell)}
+        self._maps: Dict[str, Tuple[Tuple[int, int], np.ndarray]] = {}
+        self._full_time: Dict[str, float] = {}
+        self._unsaved = 0
+        self._loaded = False
+        self._lock = Lock()
+
+        self.hits = 0
+        self.fallbacks = 0
+        self.full = 0
+        self.saved_time = 0.0
+
+    def region(self, template_name: str, frame_shape: Tuple[int, ...], template_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """(x1, y1, x2, y2) to search first, None to search the full frame right away"""
+        self._load()
+        heatmap = self._maps.get(template_name)
+        height, width = frame_shape[:2]
+        if heatmap is None or heatmap[0] != (height, width):
+            return None
+        total = heatmap[1].sum()
+        if total < self.min_hits:
+            return None
+
+        rows, cols = np.nonzero(heatmap[1] >= self.min_share * total)
+        w, h = template_size
+        x1 = max(0, cols.min() * self.cell - w // 2 - self.padding)
+        y1 = max(0, rows.min() * self.cell - h // 2 - self.padding)
+        x2 = min(width, (cols.max() + 1) * self.cell + w // 2 + self.padding)
+        y2 = min(height, (rows.max() + 1) * self.cell + h // 2 + self.padding)
+        if (x2 - x1) * (y2 - y1) > self.max_area * width * height:
+            return None
+        return int(x1), int(y1), int(x2), int(y2)
+
+    def learn(self, template_name: str, frame_shape: Tuple[int, ...], matches: list) -> None:
+        """Add the (x, y, ...) centers of full frame matches to the template's heatmap"""
+        if not matches:
+            return
+        self._load()
+        height, width = frame_shape[:2]
+        with self._lock:
+            heatmap = self._maps.get(template_name)
+            if heatmap is None or heatmap[0] != (height, width):
+                grid = (-(-height // self.cell), -(-width // self.cell))
+                heatmap = ((height, width), np.zeros(grid, dtype=np.int64))
+                self._maps[template_name] = heatmap
+            for x, y, *_ in matches:
+                if 0 <= x < width and 0 <= y < height:
+                    heatmap[1][y // self.cell, x // self.cell] += 1
+            self._unsaved += 1
+            save = self._unsaved >= self.save_every
+        if save:
+            self.save()
+
+    def record_hit(self, template_name: str, elapsed: float) -> None:
+        """The region search found the template"""
+        self.hits += 1
+        full_time = self._full_time.get(template_name)
+        if full_time is not None:
+            self.saved_time += full_time - elapsed
+
+    def record_fallback(self, elapsed: float) -> None:
+        """The region search missed, `elapsed` was spent on it in vain"""
+        self.fallbacks += 1
+        self.saved_time -= elapsed
+
+    def record_full(self, template_name: str, elapsed: float) -> None:
+        """A full frame search (without a prior or after a miss), to estimate what region hits save"""
+        self.full += 1
+        previous = self._full_time.get(template_name, elapsed)
+        self._full_time[template_name] = previous + FULL_TIME_SMOOTHING * (elapsed - previous)
+
+    def format_stats(self) -> str:
+        lookups = self.hits + self.fallbacks
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"hits={self.hits} ({hit_rate:.0%}) fallbacks={self.fallbacks} "
+            f"full frame={self.full} saved={self.saved_time:.1f}s"
+        )
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                if data.get("version") != PRIORS_VERSION or data.get("cell") != self.cell:
+                    app_logger.info(f"Spatial priors in {self.path} don't match the settings, starting over")
+                    return
+                for name, entry in data["templates"].items():
+                    height, width = entry["shape"]
+                    grid = np.zeros((-(-height // self.cell), -(-width // self.cell)), dtype=np.int64)
+                    for row, col, count in entry["hits"]:
+                        grid[row, col] = count
+                    self._maps[name] = ((height, width), grid)
+                app_logger.debug(f"Loaded spatial priors of {len(self._maps)} templates")
+            except Exception as e:
+                app_logger.warning(f"Failed to load spatial priors from {self.path}: {e}")
+
+    def save(self) -> None:
+        """Write the heatmaps to `path` if they changed"""
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = {"version": PRIORS_VERSION, "cell": self.cell, "templates": {}}
+            for name, (shape, grid) in self._maps.items():
+                rows, cols = np.nonzero(grid)
+                data["templates"][name] = {
+                    "shape": list(shape),
+                    "hits": [[int(row), int(col), int(grid[row, col])] for row, col in zip(rows, cols)],
+                }
+            self._unsaved = 0
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(f"{self.path}.tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(f"{self.path}.tmp", self.path)
+        except OSError as e:
+            app_logger.warning(f"Failed to save spatial priors to {self.path}: {e}")
+
+
+spatial_priors = SpatialPriors()
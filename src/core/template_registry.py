@@ -0,0 +1,295 @@
+"""Templates resolved, loaded and preprocessed once, optionally kept in a memory-mapped bundle"""
+
+import hashlib
+import json
+import os
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+from .logging import app_logger
+
+# Bumped whenever the bundle layout or the preprocessing changes
+BUNDLE_VERSION = 1
+# Canny hysteresis thresholds of the `edges` match mode
+EDGE_THRESHOLDS = (50, 150)
+
+
+def convert_to_mode(img: np.ndarray, mode: str) -> np.ndarray:
+    """
+    BGR image as matched in a template's `mode`: "bgr" (as is), "gray",
+    "channel:<n>" (one BGR channel) or "edges" (Canny edges of the gray image)
+    """
+    if mode == 'bgr':
+        return img
+    if mode == 'gray':
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if mode == 'edges':
+        return cv2.Canny(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), *EDGE_THRESHOLDS)
+    if mode.startswith('channel:'):
+        return np.ascontiguousarray(img[:, :, int(mode.split(':', 1)[1])])
+    raise ValueError(f"Unknown match mode '{mode}'")
+
+
+def downscale(image: np.ndarray, mask: Optional[np.ndarray], factor: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Pyramid level of a template and its mask, `factor` times smaller"""
+    scale = 1 / factor
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if mask is not None:
+        mask = cv2.resize(mask, (small.shape[1], small.shape[0]), interpolation=cv2.INTER_NEAREST)
+    return small, mask
+
+
+class CompiledTemplate:
+    """
+    A template ready for matching: the image converted to its match mode,
+    the mask from the PNG's alpha channel (None when fully opaque) and the
+    downscaled pyramid levels. `config` is the live template config entry.
+    """
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        config: dict,
+        image: np.ndarray,
+        mask: Optional[np.ndarray] = None,
+        levels: Dict[int, Tuple[np.ndarray, Optional[np.ndarray]]] = None,
+    ):
+        self.name = name
+        self.path = path
+        self.config = config
+        self.image = image
+        self.mask = mask
+        self.levels = levels or {}
+        self._regions: Dict[Tuple[int, int], Tuple[int, int, int, int]] = {}
+
+    @property
+    def threshold(self) -> float:
+        return self.config.get('threshold', CONFIG['match_threshold'])
+
+    @property
+    def mode(self) -> str:
+        return self.config.get('mode', 'bgr')
+
+    @property
+    def pyramid(self) -> Optional[int]:
+        return self.config.get('pyramid')
+
+    def region(self, screen_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The configured `region` ({"x1": "0%", "y1": "85%", "x2": "100%", "y2": "100%"})
+        as (x1, y1, x2, y2) pixels of a (width, height) screen, at least the template's size.
+        None without a region.
+        """
+        region = self.config.get('region')
+        if not region:
+            return None
+        if screen_size not in self._regions:
+            width, height = screen_size
+            h, w = self.image.shape[:2]
+            x1 = int(width * float(region['x1'].strip('%')) / 100)
+            y1 = int(height * float(region['y1'].strip('%')) / 100)
+            x2 = max(int(width * float(region['x2'].strip('%')) / 100), x1 + w)
+            y2 = max(int(height * float(region['y2'].strip('%')) / 100), y1 + h)
+            if x2 > width:
+                x1, x2 = max(0, width - (x2 - x1)), width
+            if y2 > height:
+                y1, y2 = max(0, height - (y2 - y1)), height
+            self._regions[screen_size] = (x1, y1, x2, y2)
+        return self._regions[screen_size]
+
+    def level(self, factor: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Image and mask downscaled by `factor`, computed on first use for factors not configured"""
+        if factor not in self.levels:
+            self.levels[factor] = downscale(self.image, self.mask, factor)
+        return self.levels[factor]
+
+
+class TemplateRegistry:
+    """
+    All templates of CONFIG['templates'], resolved once (env folder with
+    fallback to default), loaded and preprocessed for their mode, mask and
+    pyramid factor, so lookups on the matching hot path are a dict access.
+
+    With `template_registry.bundle` set, the preprocessed arrays are saved as
+    one flat .npy blob plus a .json index and memory-mapped on the next start
+    (np.load can't memory-map the members of an .npz archive). The index keeps
+    a key over the template files (size, mtime) and their mode and pyramid
+    settings, a stale bundle is rebuilt.
+    """
+    def __init__(self, config_dir: str = "config"):
+        self.config_dir = config_dir
+        self._templates: Dict[str, Optional[CompiledTemplate]] = {}
+        self._paths: Dict[str, str] = {}
+        self._loaded = False
+        self._lock = Lock()
+
+    def load(self) -> None:
+        """Build the registry, once; later calls do nothing"""
+        with self._lock:
+            if self._loaded:
+                return
+            started_at = time.time()
+            sources = self._resolve_all()
+            key = self._bundle_key(sources)
+            bundle = CONFIG.get('template_registry.bundle')
+
+            templates = self._read_bundle(bundle, key, sources) if bundle else None
+            origin = "bundle"
+            if templates is None:
+                origin = "files"
+                templates = {name: self._compile(name, config, path) for name, (config, path) in sources.items()}
+                if bundle:
+                    self._write_bundle(bundle, key, templates)
+
+            self._templates = templates
+            self._paths = {name: path for name, (_, path) in sources.items()}
+            self._loaded = True
+            loaded = sum(template is not None for template in templates.values())
+            app_logger.info(f"Loaded {loaded}/{len(templates)} templates from {origin} in {(time.time() - started_at) * 1000:.0f}ms")
+
+    def get(self, name: str) -> Optional[CompiledTemplate]:
+        if not self._loaded:
+            self.load()
+        if name not in self._templates:
+            app_logger.error(f"Template {name} not found in config")
+            return None
+        template = self._templates[name]
+        if template is None:
+            app_logger.error(f"Failed to load template: {self._paths[name]}")
+        return template
+
+    def names(self) -> List[str]:
+        if not self._loaded:
+            self.load()
+        return [name for name, template in self._templates.items() if template is not None]
+
+    def _resolve_all(self) -> Dict[str, Tuple[dict, str]]:
+        """Template config and file path per name, the env folder if the file exists there, else default"""
+        sources = {}
+        for name, config in CONFIG['templates'].items():
+            if not config or 'path' not in config:
+                continue
+            path = os.path.join(self.config_dir, config['path'].format(env=CONFIG['env']))
+            if not os.path.exists(path):
+                path = os.path.join(self.config_dir, config['path'].format(env="default"))
+            sources[name] = (config, path)
+        return sources
+
+    def _compile(self, name: str, config: dict, path: str) -> Optional[CompiledTemplate]:
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return None
+
+        mask = None
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            alpha = image[:, :, 3]
+            if (alpha < 255).any():
+                mask = np.ascontiguousarray(alpha)
+            image = np.ascontiguousarray(image[:, :, :3])
+
+        mode = config.get('mode', 'bgr')
+        try:
+            image = convert_to_mode(image, mode)
+        except (ValueError, IndexError) as e:
+            app_logger.error(f"Template {name} has an invalid mode '{mode}': {e}")
+            return None
+
+        template = CompiledTemplate(name, path, config, image, mask)
+        if config.get('pyramid'):
+            template.level(config['pyramid'])
+        return template
+
+    def _bundle_key(self, sources: Dict[str, Tuple[dict, str]]) -> str:
+        entries = {}
+        for name, (config, path) in sources.items():
+            stat = os.stat(path) if os.path.exists(path) else None
+            entries[name] = [
+                path, config.get('mode', 'bgr'), config.get('pyramid'),
+                stat.st_size if stat else None, stat.st_mtime_ns if stat else None,
+            ]
+        data = json.dumps({"version": BUNDLE_VERSION, "templates": entries}, sort_keys=True)
+        return hashlib.sha1(data.encode()).hexdigest()
+
+    def _read_bundle(self, bundle: str, key: str, sources: Dict[str, Tuple[dict, str]]) -> Optional[Dict[str, Optional[CompiledTemplate]]]:
+        try:
+            if not os.path.exists(f"{bundle}.json"):
+                return None
+            with open(f"{bundle}.json") as f:
+                index = json.load(f)
+            if index.get("key") != key:
+                app_logger.info("Template bundle is out of date, rebuilding")
+                return None
+
+            blob = np.load(f"{bundle}.npy", mmap_mode='r')
+
+            def view(entry):
+                if entry is None:
+                    return None
+                offset, shape = entry
+                return blob[offset:offset + int(np.prod(shape))].reshape(shape)
+
+            templates = {}
+            for name, (config, path) in sources.items():
+                arrays = index["templates"].get(name)
+                if arrays is None:
+                    templates[name] = None
+                    continue
+                levels = {
+                    int(factor): (view(level["image"]), view(level["mask"]))
+                    for factor, level in arrays["levels"].items()
+                }
+                templates[name] = CompiledTemplate(name, path, config, view(arrays["image"]), view(arrays["mask"]), levels)
+            return templates
+        except Exception as e:
+            app_logger.warning(f"Failed to read template bundle {bundle}: {e}")
+            return None
+
+    def _write_bundle(self, bundle: str, key: str, templates: Dict[str, Optional[CompiledTemplate]]) -> None:
+        chunks = []
+        offset = 0
+
+        def add(array):
+            nonlocal offset
+            if array is None:
+                return None
+            chunks.append(array.ravel())
+            entry = [offset, list(array.shape)]
+            offset += array.size
+            return entry
+
+        index = {"version": BUNDLE_VERSION, "key": key, "templates": {}}
+        for name, template in templates.items():
+            if template is None:
+                index["templates"][name] = None
+                continue
+            index["templates"][name] = {
+                "image": add(template.image),
+                "mask": add(template.mask),
+                "levels": {
+                    str(factor): {"image": add(image), "mask": add(mask)}
+                    for factor, (image, mask) in template.levels.items()
+                },
+            }
+
+        try:
+            os.makedirs(os.path.dirname(bundle) or ".", exist_ok=True)
+            blob = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+            with open(f"{bundle}.npy.tmp", "wb") as f:
+                np.save(f, blob)
+            with open(f"{bundle}.json.tmp", "w") as f:
+                json.dump(index, f)
+            os.replace(f"{bundle}.npy.tmp", f"{bundle}.npy")
+            os.replace(f"{bundle}.json.tmp", f"{bundle}.json")
+            app_logger.info(f"Saved template bundle {bundle} ({blob.nbytes / 1024 / 1024:.1f}MB)")
+        except OSError as e:
+            app_logger.warning(f"Failed to save template bundle {bundle}: {e}")
+
+
+template_registry = TemplateRegistry()
@@ -63,17 +63,6 @@ def get_text_regions(
     if y2 - y1 < min_height:
         y2 = min(height, y1 + min_height)
     
-    # Take screenshot and crop to search region
-    if not controls.device.take_screenshot():
-        return (0, 0, 0, 0), (0, 0, 0, 0), None
-        
-    img = cv2.imread('tmp/screen.png')
-    if img is None:
-        return (0, 0, 0, 0), (0, 0, 0, 0), None
-        
-    # Crop image to search region
-    search_region = img[y1:y2, x1:x2]
-    
     # Find brackets within cropped region
     left_brackets = controls.find_templates(
         "left_bracket",
@@ -158,14 +147,13 @@ def clean_text(text: str) -> str:
 
 def extract_text_from_region(region: Tuple[int, int, int, int], languages: Union[str, List[str]] = 'eng', img: Optional[np.ndarray] = None) -> str:
     if img is None:
-        if not controls.device.take_screenshot():
+        # Only the text band is needed
+        cropped = _take_and_load_screenshot(region)
+        if cropped is None:
             return "", ""
-        img = cv2.imread('tmp/screen.png')
-        if img is None:
-            return "", ""
-    
-    x1, y1, x2, y2 = region
-    cropped = img[y1:y2, x1:x2]
+    else:
+        x1, y1, x2, y2 = region
+        cropped = img[y1:y2, x1:x2]
     
     if languages == 'eng':
         # Convert to grayscale
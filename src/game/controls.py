@@ -1,12 +1,12 @@
 
 import time
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 import asyncio
 
 from src.core.config import CONFIG
 from src.core.helpers import throttle
-from src.core.image_processing import find_templates
+from src.core.image_processing import ScoredMatch, find_all, find_any, find_templates
 from src.core.logging import app_logger
 from src.game.device import device
 
@@ -45,6 +45,7 @@ class GameControls():
         tap_offset: Tuple[int, int] = (0, 0),
         search_region: Tuple[int, int, int, int] = None,
         file_name_getter: Callable[[str, bool], str] = None,
+        tap_verify: bool = False,
     ) -> Optional[Tuple[int, int]]:
         """A wrapper function that calls find_templates with all its arguments."""
 
@@ -61,6 +62,7 @@ class GameControls():
             tap_offset=tap_offset,
             search_region=search_region,
             file_name_getter=file_name_getter,
+            tap_verify=tap_verify,
             # Diff
             find_one=True
         )
@@ -80,6 +82,7 @@ class GameControls():
         tap_offset: Tuple[int, int] = (0, 0),
         search_region: Tuple[int, int, int, int] = None,
         file_name_getter: Callable[[str, bool], str] = None,
+        tap_verify: bool = False,
     ) -> Optional[List[Tuple[int, int]]]:
         """A wrapper function that calls find_templates with all its arguments."""
 
@@ -96,10 +99,57 @@ class GameControls():
             tap_offset=tap_offset,
             search_region=search_region,
             file_name_getter=file_name_getter,
+            tap_verify=tap_verify,
         )
         
         return locations
 
+    def find_any(
+        self,
+        template_names: List[str],
+        error_msg: Optional[str] = None,
+        success_msg: Optional[str] = None,
+        critical: bool = False,
+        wait: float = None,
+        interval: float = None,
+        tap: bool = False,
+        tap_duration: float = None,
+        tap_offset: Tuple[int, int] = (0, 0),
+        search_region: Tuple[int, int, int, int] = None,
+        file_name_getter: Callable[[str, bool], str] = None,
+    ) -> Optional[Tuple[str, ScoredMatch]]:
+        """First of the templates found on one frame: (template name, (x, y, confidence))"""
+        return find_any(
+            template_names=template_names,
+            error_msg=error_msg,
+            success_msg=success_msg,
+            critical=critical,
+            wait=wait,
+            interval=interval,
+            tap=tap,
+            tap_duration=tap_duration,
+            tap_offset=tap_offset,
+            search_region=search_region,
+            file_name_getter=file_name_getter,
+        )
+
+    def find_all(
+        self,
+        template_names: List[str],
+        wait: float = None,
+        interval: float = None,
+        search_region: Tuple[int, int, int, int] = None,
+        file_name_getter: Callable[[str, bool], str] = None,
+    ) -> Dict[str, List[ScoredMatch]]:
+        """Scored matches of every template on one frame"""
+        return find_all(
+            template_names=template_names,
+            wait=wait,
+            interval=interval,
+            search_region=search_region,
+            file_name_getter=file_name_getter,
+        )
+
     # Main
     def launch_game(self) -> bool:
         """Launch the game"""
@@ -7,6 +7,7 @@ from .windows import WindowsDevice
 
 # Re-export DeviceStrategy from strategy.py
 from .strategy import DeviceStrategy
+from .gestures import GestureBatch, GestureResult
 from .device import DeviceContext, device
 
 # Define __all__ to explicitly list what should be imported
@@ -14,6 +15,8 @@ from .device import DeviceContext, device
 # and, crucially, to hint to Pylance about the intended public API.
 __all__ = [
     "DeviceStrategy",
+    "GestureBatch",
+    "GestureResult",
     "ADBDevice",
     "WindowsDevice",
     "DeviceContext",
@@ -1,88 +1,313 @@
+import json
 import os
 import re
+import struct
 import subprocess
 import time
 import traceback
+import zlib
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import numpy as np
-from typing import Optional
 import cv2
 
 from src.core.config import CONFIG
 from src.core.helpers import ensure_dir
 from src.core.logging import app_logger
-from .strategy import DeviceStrategy
+from .burst import BurstTap
+from .device_info import DeviceInfo
+from .gestures import GestureBatch, GestureResult, GestureStep
+from .strategy import DeviceStrategy, crop_to_region
+from .touch import TouchInjector
+from .transport import AdbTransport, create_transport
+
+# Android PixelFormat values that `screencap` may emit, mapped to the
+# conversion into the BGR layout used for template matching
+RAW_FORMAT_TO_BGR = {
+    1: cv2.COLOR_RGBA2BGR,  # RGBA_8888
+    2: cv2.COLOR_RGBA2BGR,  # RGBX_8888
+    5: cv2.COLOR_BGRA2BGR,  # BGRA_8888
+}
+
+def parse_raw_screencap(data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """Parse raw `screencap` output into an (height, width, 4) view over the pixel bytes.
+
+    The header is width, height and format as little-endian uint32, followed by
+    a colorspace uint32 on newer Android versions. The header size is derived
+    from the payload length so both layouts are supported.
+
+    Returns:
+        (pixels, pixel_format) or None if the data is not a 4 byte per pixel frame
+    """
+    if len(data) < 12:
+        return None
+
+    width, height, pixel_format = struct.unpack_from('<III', data, 0)
+    if pixel_format not in RAW_FORMAT_TO_BGR:
+        app_logger.debug(f"Unsupported raw screencap pixel format: {pixel_format}")
+        return None
+
+    header_size = len(data) - width * height * 4
+    if header_size not in (12, 16):
+        app_logger.debug(f"Unexpected raw screencap size {len(data)} for {width}x{height}")
+        return None
+
+    pixels = np.frombuffer(data, dtype=np.uint8, offset=header_size)
+    return pixels.reshape(height, width, 4), pixel_format
+
+# Capture modes in order of preference when benchmark timings tie
+CAPTURE_MODES = ("raw_gzip", "raw", "png")
+
+class CaptureModeStore:
+    """Persists the capture mode picked by the benchmark, per device"""
+    def __init__(self, state_file: Path = Path("state/capture_modes.json")):
+        self.state_file = state_file
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self._state = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.state_file.exists():
+            return {}
+
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except Exception as e:
+            app_logger.error(f"Error loading capture modes: {e}")
+            return {}
+
+    def save(self) -> None:
+        try:
+            with open(self.state_file, "w") as f:
+                json.dump(self._state, f, indent=2)
+        except Exception as e:
+            app_logger.error(f"Error saving capture modes: {e}")
+
+    def get(self, device_id: str) -> Optional[str]:
+        mode = self._state.get(device_id, {}).get("mode")
+        return mode if mode in CAPTURE_MODES else None
+
+    def set(self, device_id: str, mode: str, timings_ms: Dict[str, float]) -> None:
+        self._state[device_id] = {"mode": mode, "timings_ms": timings_ms, "measured_at": time.time()}
+        self.save()
+
+    def forget(self, device_id: str) -> None:
+        if self._state.pop(device_id, None) is not None:
+            self.save()
 
 # 2. Concrete Strategies
 class ADBDevice(DeviceStrategy):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, device_id: Optional[str] = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.device_id = None
+        # An explicit serial skips device discovery
+        self.device_id = device_id
         self.device_id = self.get_connected_device()
+        self._transport: Optional[AdbTransport] = None
+        # Capture modes that failed on this device, not retried for the session
+        self._failed_capture_modes: Set[str] = set()
+        self._capture_mode: Optional[str] = None
+        self.info = DeviceInfo(
+            package_ttl=CONFIG.adb.get('package_state_ttl', 5.0),
+            ttls={'orientation': CONFIG.adb.get('orientation_ttl', 2.0)},
+        )
+        self._touch: Optional[TouchInjector] = None
+        self._touch_detected = False
+        self._device_clock_ns: Optional[bool] = None
+
+    @property
+    def transport(self) -> AdbTransport:
+        """Transport used for every device command, created on first use"""
+        if self._transport is None:
+            self._transport = create_transport(self.device_id)
+            app_logger.info(f"Using '{self._transport.name}' ADB transport for device {self.device_id}")
+        return self._transport
+
+    def log_performance_stats(self) -> None:
+        """Log per-command latency of the ADB transport"""
+        if self._transport is not None:
+            app_logger.info(f"ADB command latency ({self._transport.name}): {self._transport.stats.format_summary()}")
+        app_logger.info(f"Device metadata cache: {self.info.format_stats()}")
 
     @property
     def is_app_running(self) -> bool:
         # Check if game is running first
-        current_app = self.get_current_running_app()
+        current_app = self.info.get_package(self.get_current_running_app)
         if current_app == CONFIG['adb']['package_name']:
             return True
 
     """
     A Concrete Strategy for controlling a device via ADB commands.
     """
+    @property
+    def touch(self) -> Optional[TouchInjector]:
+        """Touchscreen event writer, detected on first use. None when `input` has to be used"""
+        if not self._touch_detected:
+            self._touch_detected = True
+            if CONFIG.adb.get('input_backend', 'sendevent') == 'sendevent':
+                self._touch = TouchInjector.detect(self.transport.shell)
+                if self._touch is None:
+                    app_logger.warning("No writable touchscreen found, using 'input' for taps and swipes")
+        return self._touch
+
+    def _display_geometry(self) -> Tuple[int, int, int]:
+        width, height = self.get_screen_size()
+        return width, height, self.get_orientation() or 0
+
+    def _inject_touch(self, script: str, key: str) -> Optional[bool]:
+        """
+        Run a TouchInjector script. False when the device rejected it: the
+        injector is dropped for the session and the caller falls back to
+        'input'. None when the transport failed, the script may have run
+        already so it must not be sent again in any form.
+        """
+        output = self.transport.persistent_shell(script, key=key)
+        if output is None:
+            app_logger.error(f"No response to {key}, not repeating it")
+            return None
+        if not output.strip():
+            return True
+
+        app_logger.warning(f"Touch injection failed ({output.strip()[:200]}), falling back to 'input'")
+        self._touch = None
+        return False
+
     def _perform_click(self, x: int, y: int, duration_ms: int = 200) -> bool:
         """Execute a long press at coordinates with specified duration
         
         Args:
-            device_id: Device identifier
             x: X coordinate
             y: Y coordinate
-            duration: Press duration in milliseconds
+            duration_ms: Press duration in milliseconds
         """
-
-        device_id: str = self.device_id
-
-        try:
-            cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell input swipe {x} {y} {x} {y} {duration_ms}"
-            subprocess.run(cmd, shell=True, check=True)
-            return True
-        
-        except subprocess.CalledProcessError:
-            app_logger.error(f"Failed to execute long press on device {device_id}")
+        touch = self.touch
+        if touch is not None:
+            injected = self._inject_touch(touch.tap(x, y, duration_ms, self._display_geometry()), "sendevent tap")
+            if injected is not False:
+                return bool(injected)
+
+        if self.transport.shell(f"input swipe {x} {y} {x} {y} {duration_ms}", retry=False) is None:
+            app_logger.error(f"Failed to execute long press on device {self.device_id}")
             return False
+        return True
 
     def _perform_swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration_ms: int = 300) -> bool:
         """Swipe screen from start to end coordinates"""
-        try:
-            cmd = f"{CONFIG.adb['binary_path']} -s {self.device_id} shell input swipe {start_x} {start_y} {end_x} {end_y} {duration_ms}"
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            hold_cmd = f"{CONFIG.adb['binary_path']} -s {self.device_id} shell input swipe {start_x} {start_y} {start_x} {start_y} {100}"
-            result = subprocess.run(hold_cmd, capture_output=True, text=True, check=True)
-            
-            return result.returncode == 0
-            
-        except Exception as e:
-            app_logger.error(f"Error swiping screen: {e}")
+        # Swipe and the short hold at the start point go out in one round trip
+        touch = self.touch
+        if touch is not None:
+            display = self._display_geometry()
+            script = "\n".join([
+                touch.swipe((start_x, start_y), (end_x, end_y), duration_ms, display),
+                touch.tap(start_x, start_y, 100, display),
+            ])
+            injected = self._inject_touch(script, "sendevent swipe")
+            if injected is not False:
+                return bool(injected)
+
+        cmd = (
+            f"input swipe {start_x} {start_y} {end_x} {end_y} {duration_ms}; "
+            f"input swipe {start_x} {start_y} {start_x} {start_y} {100}"
+        )
+        if self.transport.shell(cmd, retry=False) is None:
+            app_logger.error("Error swiping screen")
             return False
+        return True
+
+    def run_gestures(self, batch: GestureBatch) -> GestureResult:
+        """
+        Run the whole batch as one shell script, so steps follow each other
+        without host round trips. With a nanosecond `date` on the device every
+        step is timestamped there, the timings don't include transport latency.
+        """
+        touch = self.touch
+        display = self._display_geometry() if touch is not None else None
+        marker = "date +%s%N" if self.device_clock_ns else None
+
+        lines = [marker] if marker else []
+        for step in batch.steps:
+            lines.append(self._gesture_command(step, touch, display))
+            if marker:
+                lines.append(marker)
+
+        started_at = time.perf_counter()
+        output = self.transport.persistent_shell("\n".join(lines), key="gestures")
+        elapsed = time.perf_counter() - started_at
+        if output is None:
+            app_logger.error("Failed to run gestures")
+            return GestureResult(False, [])
+
+        # Only nanosecond clock readings count as stamps, each step ran between the one before and after it
+        output_lines = [line.strip() for line in output.splitlines() if line.strip()]
+        stamps = [int(line) for line in output_lines if line.isdigit() and len(line) > 12] if marker else []
+        errors = [line for line in output_lines if not line.isdigit()]
+        timings = [(step, (end - start) / 1e9) for step, start, end in zip(batch.steps, stamps, stamps[1:])]
+        if errors:
+            app_logger.warning(f"Gestures failed: {errors[0][:200]}")
+            if touch is not None:
+                app_logger.warning("Touch injection failed, falling back to 'input'")
+                self._touch = None
+            return GestureResult(False, timings)
+
+        if marker and len(stamps) != len(batch.steps) + 1:
+            # Stamps can't be paired with steps anymore
+            app_logger.warning(f"Expected {len(batch.steps) + 1} device timestamps, got {len(stamps)}")
+            timings = []
+        return GestureResult(True, timings, total=(stamps[-1] - stamps[0]) / 1e9 if marker and stamps else elapsed)
+
+    def _send_tap_chunk(self, taps: List[BurstTap]) -> int:
+        """Send a chunk of burst taps as one script over the persistent shell"""
+        touch = self.touch
+        display = self._display_geometry() if touch is not None else None
+        lines = []
+        for x, y, duration_ms, pause in taps:
+            lines.append(touch.tap(x, y, duration_ms, display) if touch is not None else f"input swipe {x} {y} {x} {y} {duration_ms}")
+            if pause > 0:
+                lines.append(f"sleep {pause:.3f}")
+
+        if touch is not None:
+            # When the device rejects the script the injector is dropped and the chunk is resent with 'input'
+            injected = self._inject_touch("\n".join(lines), "sendevent burst")
+            if injected is False:
+                return self._send_tap_chunk(taps)
+            return len(taps) if injected else 0
+        return len(taps) if self.transport.persistent_shell("\n".join(lines), key="input burst") is not None else 0
+
+    @property
+    def device_clock_ns(self) -> bool:
+        """Whether the device's `date` supports %N (toybox on older Android doesn't)"""
+        if self._device_clock_ns is None:
+            output = (self.transport.shell("date +%s%N") or "").strip()
+            self._device_clock_ns = output.isdigit() and len(output) > 12
+        return self._device_clock_ns
+
+    def _gesture_command(self, step: GestureStep, touch: Optional[TouchInjector], display: Optional[Tuple[int, int, int]]) -> str:
+        params = step.params
+        if step.kind == "tap":
+            x, y, duration_ms = self._humanize_tap(params['x'], params['y'], params['duration'], params['critical'])
+            if touch is not None:
+                return touch.tap(x, y, duration_ms, display)
+            return f"input swipe {x} {y} {x} {y} {duration_ms}"
+        if step.kind == "swipe":
+            if touch is not None:
+                return touch.swipe(params['start'], params['end'], params['duration_ms'], display)
+            return f"input swipe {params['start'][0]} {params['start'][1]} {params['end'][0]} {params['end'][1]} {params['duration_ms']}"
+        if step.kind == "key":
+            return f"input keyevent {params['keycode']}"
+        if step.kind == "sleep":
+            return f"sleep {self.resolve_delay(params['delay'], params['default']):.3f}"
+        raise ValueError(f"Unknown gesture step '{step.kind}'")
 
     def press_back(self) -> bool:
         """Press back button"""
-        try:
-            cmd = f"{CONFIG.adb['binary_path']} -s {self.device_id} shell input keyevent 4"
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return result.returncode == 0
-            
-        except Exception as e:
-            app_logger.error(f"Error pressing back: {e}")
+        if self.transport.shell("input keyevent 4", retry=False) is None:
+            app_logger.error("Error pressing back")
             return False
+        return True
         
-    def simulate_shake(device_id: str, duration_ms: int = 1000) -> bool:
+    def simulate_shake(self, duration_ms: int = 1000) -> bool:
         """Simulate device shake using appropriate method for emulator or real device
         
         Args:
-            device_id: The device identifier
             duration_ms: Duration of shake in milliseconds (default 1000ms)
         
         Returns:
@@ -108,19 +333,20 @@ class ADBDevice(DeviceStrategy):
                 app_logger.info(f"Trying shake pattern: {pattern}")
                 
                 for values in pattern:
-                    # Use the full adb shell command instead of emu
-                    cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell \"setprop debug.sensors.accelerometer.x {values.split(':')[0]};" \
-                        f"setprop debug.sensors.accelerometer.y {values.split(':')[1]};" \
-                        f"setprop debug.sensors.accelerometer.z {values.split(':')[2]}\""
+                    x, y, z = values.split(':')
+                    cmd = f"setprop debug.sensors.accelerometer.x {x};" \
+                        f"setprop debug.sensors.accelerometer.y {y};" \
+                        f"setprop debug.sensors.accelerometer.z {z}"
                     app_logger.debug(f"Executing: {cmd}")
-                    subprocess.run(cmd, shell=True)
+                    self.transport.shell(cmd)
                     time.sleep(0.1)
                     
                 # Reset to normal
-                cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell \"setprop debug.sensors.accelerometer.x 0;" \
-                    f"setprop debug.sensors.accelerometer.y 0;" \
-                    f"setprop debug.sensors.accelerometer.z 9.81\""
-                subprocess.run(cmd, shell=True)
+                self.transport.shell(
+                    "setprop debug.sensors.accelerometer.x 0;"
+                    "setprop debug.sensors.accelerometer.y 0;"
+                    "setprop debug.sensors.accelerometer.z 9.81"
+                )
                 time.sleep(0.2)
                 
             return True
@@ -134,14 +360,35 @@ class ADBDevice(DeviceStrategy):
         # subprocess.run(['adb', '-s', self.device_id, 'shell', 'input', 'text', text])
 
     def get_screen_size(self) -> tuple[int, int]:
-        """Get device screen size"""
+        """Get device screen size, queried once until the device is rotated or resized"""
+        return self.info.get('screen_size', self._query_screen_size)
+
+    def get_density(self) -> Optional[int]:
+        """Get device screen density (dpi)"""
+        return self.info.get('density', self._query_density)
+
+    def get_orientation(self) -> Optional[int]:
+        """Get display rotation: 0, 1, 2 or 3 (quarter turns from the natural orientation),
+        queried again after `adb.orientation_ttl` seconds since a half turn keeps the frame size"""
+        return self.info.get('orientation', self._query_orientation)
+
+    def _query_density(self) -> Optional[int]:
+        output = self.transport.shell("wm density")
+        # An override density is listed after the physical one and wins
+        matches = re.findall(r'density: (\d+)', output or "")
+        return int(matches[-1]) if matches else None
+
+    def _query_orientation(self) -> Optional[int]:
+        output = self.transport.shell("dumpsys input | grep -m 1 SurfaceOrientation")
+        match = re.search(r'SurfaceOrientation: (\d)', output or "")
+        return int(match.group(1)) if match else None
+
+    def _query_screen_size(self) -> tuple[int, int]:
         try:
-            result = subprocess.run(
-                [CONFIG.adb["binary_path"], '-s', self.device_id, 'shell', 'wm', 'size'],
-                capture_output=True, 
-                text=True
-            )
-            match = re.search(r'(\d+)x(\d+)', result.stdout)
+            output = self.transport.shell("wm size")
+            if output is None:
+                raise ValueError("'wm size' failed")
+            match = re.search(r'(\d+)x(\d+)', output)
             if match:
                 return int(match.group(1)), int(match.group(2))
             raise ValueError("Could not parse screen size")
@@ -150,17 +397,15 @@ class ADBDevice(DeviceStrategy):
 
     def launch_package(self, package_name: str = CONFIG['adb']['package_name']):
         """Launch an app package"""
-        result = subprocess.run(
-            [CONFIG.adb["binary_path"], '-s', self.device_id, 'shell', 'monkey', '-p', package_name, '-c', 'android.intent.category.LAUNCHER', '1'],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        output = self.transport.shell(f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1")
+        self.info.invalidate_package()
         self.human_delay('launch_wait', 10.0)
-        return result.returncode == 0
+        return output is not None
 
     def force_stop_package(self, package_name: str = CONFIG['adb']['package_name']):
         """Force stop an app package"""
-        subprocess.run([CONFIG.adb["binary_path"], '-s', self.device_id, 'shell', 'am', 'force-stop', package_name])
+        self.transport.shell(f"am force-stop {package_name}")
+        self.info.invalidate_package()
 
     def get_device_list(self) -> List[str]:
         """Get list of connected devices"""
@@ -282,67 +527,57 @@ class ADBDevice(DeviceStrategy):
         Returns the package name of the currently running app on the device.
         """
         try:
-            result = subprocess.run(
-                [CONFIG.adb["binary_path"], '-s', self.device_id, 'shell', 'dumpsys', 'window', 'windows'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            for line in result.stdout.splitlines():
+            output = self.transport.shell("dumpsys window windows")
+            if output is None:
+                app_logger.error("Failed to get current running app")
+                return None
+
+            for line in output.splitlines():
                 if 'mCurrentFocus' in line or 'mFocusedApp' in line:
                     package_name = line.split('/')[0].split()[-1]
                     app_logger.debug(f"Current running app: {package_name}")
                     return package_name
             return None
         
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             app_logger.exception(f"Failed to get current running app: {e}")
             return None
 
-    def take_screenshot(self) -> Optional[np.ndarray]:
+    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
         """
         Takes a screenshot directly into memory, decodes it into a NumPy array,
         returns the array, and initiates a non-blocking save to disk.
+        The capture mode is picked by `adb.capture_mode` (see `capture_mode`),
+        raw captures fall back to PNG if the framebuffer can't be read.
+        With `region` (x1, y1, x2, y2) only that band is returned; raw captures
+        only convert the rows and columns inside it, and nothing is saved.
         Returns None on failure.
         """
         try:
-            cmd = f"{CONFIG.adb['binary_path']} -s {self.device_id} " + 'exec-out "screencap -p 2>/dev/null"'
-            
-            result = subprocess.run(cmd, capture_output=True, text=False, check=False)
+            capture_mode = self.capture_mode
 
-            if result.returncode != 0:
-                error_output = result.stderr.decode(errors='replace').strip()
-                if error_output:
-                    app_logger.error(f"ADB command failed with return code {result.returncode}. Stderr: '{error_output}'")
-                else:
-                    app_logger.error(f"ADB command failed with return code {result.returncode}, but no stderr output.")
-                return None
+            image_np = None
+            if capture_mode != 'png':
+                image_np = self._capture_with_mode(capture_mode, region)
+                if image_np is None:
+                    app_logger.debug(f"{capture_mode} capture failed, falling back to PNG capture")
 
-            screenshot_bytes = result.stdout
-            
-            if not screenshot_bytes:
-                app_logger.error("No screenshot data (0 bytes) received from device, even though ADB command succeeded.")
-                return None
-
-            # --- Decode bytes to NumPy array ---
-            np_bytes = np.frombuffer(screenshot_bytes, np.uint8)
-            image_np = cv2.imdecode(np_bytes, cv2.IMREAD_COLOR)
+            if image_np is None:
+                image_np = self._capture_png(region)
 
-            if image_np is None or image_np.size == 0:
-                app_logger.error(f"Failed to decode screenshot bytes into an image (invalid image data?). Bytes received: {len(screenshot_bytes)}.")
-                debug_filepath = Path("tmp") / "corrupted_screenshot_debug.bin"
-                with open(debug_filepath, "wb") as f:
-                    f.write(screenshot_bytes)
-                app_logger.error(f"Raw received bytes (length {len(screenshot_bytes)}) saved to {debug_filepath} for inspection.")
+            if image_np is None:
                 return None
 
-            # --- Non-blocking save to disk ---
-            ensure_dir("tmp")
-            output_filepath = 'tmp/screen.png'
-            self._save_image_to_disk_background(output_filepath, image_np)
-            
-            app_logger.debug(f"Screenshot captured and decoding process initiated. Saving to {output_filepath} in background.")
-            self.cleanup_device_screenshots()
+            if region is None:
+                # A different frame size means the device was rotated or resized
+                self.info.observe_frame(image_np.shape[1], image_np.shape[0])
+
+                # --- Non-blocking save to disk ---
+                ensure_dir("tmp")
+                output_filepath = 'tmp/screen.png'
+                self._save_image_to_disk_background(output_filepath, image_np)
+                
+                app_logger.debug(f"Screenshot captured and decoding process initiated. Saving to {output_filepath} in background.")
 
             return image_np
 
@@ -352,16 +587,184 @@ class ADBDevice(DeviceStrategy):
         except Exception as e:
             app_logger.error(f"An unexpected error occurred during screenshot capture: {e}")
             return None
+
+    @property
+    def capture_mode(self) -> str:
+        """
+        Capture mode in use: "png", "raw" or "raw_gzip". With `adb.capture_mode`
+        set to "auto" the mode is benchmarked once per device and remembered
+        in state/capture_modes.json.
+        """
+        if self._capture_mode is None:
+            configured = CONFIG.adb.get('capture_mode', 'auto')
+            if configured == 'auto':
+                store = CaptureModeStore()
+                self._capture_mode = store.get(self.device_id)
+                if self._capture_mode is None:
+                    self._capture_mode = self.benchmark_capture_modes(store)
+                else:
+                    app_logger.info(f"Using stored '{self._capture_mode}' capture mode for device {self.device_id}")
+            elif configured in CAPTURE_MODES:
+                self._capture_mode = configured
+            else:
+                app_logger.warning(f"Unknown capture mode '{configured}', using PNG capture")
+                self._capture_mode = 'png'
+
+        if self._capture_mode in self._failed_capture_modes:
+            # raw_gzip -> raw -> png
+            fallbacks = CAPTURE_MODES[CAPTURE_MODES.index(self._capture_mode) + 1:]
+            return next((mode for mode in fallbacks if mode not in self._failed_capture_modes), 'png')
+        return self._capture_mode
+
+    def benchmark_capture_modes(self, store: Optional[CaptureModeStore] = None, runs: int = None) -> str:
+        """
+        Time every capture mode over the current link and store the fastest
+        one for this device. A mode that fails or produces a frame of a
+        different size than PNG capture is skipped.
+        """
+        runs = runs or CONFIG.adb.get('capture_benchmark_runs', 3)
+        timings_ms: Dict[str, float] = {}
+        reference_shape = None
+
+        for mode in reversed(CAPTURE_MODES):
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                image_np = self._capture_with_mode(mode)
+                elapsed = time.perf_counter() - start
+                if image_np is None or (reference_shape is not None and image_np.shape != reference_shape):
+                    samples = []
+                    break
+                samples.append(elapsed)
+                if mode == 'png':
+                    reference_shape = image_np.shape
+
+            if samples:
+                timings_ms[mode] = round(sorted(samples)[len(samples) // 2] * 1000, 1)
+            app_logger.info(f"Capture benchmark '{mode}': {f'{timings_ms[mode]}ms' if mode in timings_ms else 'failed'}")
+
+        if not timings_ms:
+            app_logger.warning("No capture mode worked during the benchmark, using PNG capture")
+            return 'png'
+
+        best_mode = min(timings_ms, key=lambda mode: (timings_ms[mode], CAPTURE_MODES.index(mode)))
+        app_logger.info(f"Using '{best_mode}' capture mode for device {self.device_id}")
+        if self.device_id:
+            (store or CaptureModeStore()).set(self.device_id, best_mode, timings_ms)
+        return best_mode
+
+    def _capture_with_mode(self, mode: str, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        captures: Dict[str, Callable[[Optional[Tuple[int, int, int, int]]], Optional[np.ndarray]]] = {
+            'png': self._capture_png,
+            'raw': self._capture_raw,
+            'raw_gzip': self._capture_raw_gzip,
+        }
+        if mode in self._failed_capture_modes:
+            return None
+        return captures[mode](region)
+
+    def _disable_capture_mode(self, mode: str, reason: str) -> None:
+        """Stop using a capture mode for this session, and re-benchmark on the next start"""
+        app_logger.warning(f"{reason}, not using '{mode}' capture from now on.")
+        self._failed_capture_modes.add(mode)
+        if mode == self._capture_mode and CONFIG.adb.get('capture_mode', 'auto') == 'auto':
+            CaptureModeStore().forget(self.device_id)
+
+    def _exec_out(self, command: str) -> Optional[bytes]:
+        """Run `adb exec-out` and return the raw stdout bytes, or None on failure"""
+        output = self.transport.exec_out(command)
+        if output is None:
+            return None
+
+        if not output:
+            app_logger.error("No screenshot data (0 bytes) received from device, even though ADB command succeeded.")
+            return None
+
+        return output
+
+    def _capture_png(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """Capture a PNG encoded screenshot and decode it on the host, PNG can
+        only be decoded as a whole so `region` is cropped after decoding"""
+        screenshot_bytes = self._exec_out("screencap -p 2>/dev/null")
+        if screenshot_bytes is None:
+            return None
+
+        # --- Decode bytes to NumPy array ---
+        np_bytes = np.frombuffer(screenshot_bytes, np.uint8)
+        image_np = cv2.imdecode(np_bytes, cv2.IMREAD_COLOR)
+
+        if image_np is None or image_np.size == 0:
+            app_logger.error(f"Failed to decode screenshot bytes into an image (invalid image data?). Bytes received: {len(screenshot_bytes)}.")
+            ensure_dir("tmp")
+            debug_filepath = Path("tmp") / "corrupted_screenshot_debug.bin"
+            with open(debug_filepath, "wb") as f:
+                f.write(screenshot_bytes)
+            app_logger.error(f"Raw received bytes (length {len(screenshot_bytes)}) saved to {debug_filepath} for inspection.")
+            return None
+
+        return crop_to_region(image_np, region)
+
+    def _capture_raw(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """Capture the raw framebuffer (`screencap` without `-p`), skipping PNG encode/decode"""
+        screenshot_bytes = self._exec_out("screencap 2>/dev/null")
+        if screenshot_bytes is None:
+            return None
+
+        return self._decode_raw(screenshot_bytes, 'raw', region)
+
+    def _capture_raw_gzip(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """
+        Capture the raw framebuffer compressed by the device's `gzip`, which is
+        much smaller on the wire for mostly flat UI frames. Decompression runs
+        while the data is still arriving.
+        """
+        # wbits=31 expects a gzip header
+        decompressor = zlib.decompressobj(wbits=31)
+        chunks = []
+
+        def consume(chunk: bytes) -> None:
+            chunks.append(decompressor.decompress(chunk))
+
+        try:
+            if not self.transport.exec_out_stream("screencap 2>/dev/null | gzip -1 2>/dev/null", consume):
+                return None
+            chunks.append(decompressor.flush())
+        except zlib.error as e:
+            self._disable_capture_mode('raw_gzip', f"Failed to decompress gzip screencap data ({e})")
+            return None
+
+        if not decompressor.eof:
+            # Also happens when the device has no gzip and the output is empty
+            self._disable_capture_mode('raw_gzip', "Incomplete gzip screencap data")
+            return None
+
+        return self._decode_raw(b''.join(chunks), 'raw_gzip', region)
+
+    def _decode_raw(
+        self,
+        screenshot_bytes: bytes,
+        mode: str,
+        region: Optional[Tuple[int, int, int, int]] = None,
+    ) -> Optional[np.ndarray]:
+        """Convert raw `screencap` output to a BGR frame, only the pixels in `region` if given"""
+        frame = parse_raw_screencap(screenshot_bytes)
+        if frame is None:
+            # The device doesn't produce a framebuffer we understand, stop trying for this session
+            self._disable_capture_mode(mode, f"Failed to parse raw screencap data ({len(screenshot_bytes)} bytes)")
+            return None
+
+        pixels, pixel_format = frame
+        # Slicing the view is free, only the band is converted (and copied)
+        return cv2.cvtColor(crop_to_region(pixels, region), RAW_FORMAT_TO_BGR[pixel_format])
         
     def cleanup_device_screenshots(self) -> None:
         """Clean up screenshots from device"""
         try:
-            cmd = f"{CONFIG.adb['binary_path']} -s {self.device_id} shell rm -f /sdcard/screen*.png"
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
+            # The glob must be expanded by the device shell, not the host
+            if self.transport.shell("rm -f /sdcard/screen*.png") is not None:
                 app_logger.debug("Cleaned up device screenshots")
             else:
-                app_logger.warning(f"Failed to clean device screenshots: {result.stderr}")
+                app_logger.warning("Failed to clean device screenshots")
         except Exception as e:
             app_logger.error(f"Error cleaning device screenshots: {e}")
 
@@ -0,0 +1,132 @@
+"""Tap bursts: many taps on one spot at a steady rate"""
+
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from src.core.logging import app_logger
+
+# (x, y, duration_ms, pause after the tap in seconds)
+BurstTap = Tuple[int, int, int, float]
+
+
+class BurstResult:
+    """Taps sent by a burst and the rate actually achieved"""
+    def __init__(self, taps: int, elapsed: float, target_rate: float, stopped: bool):
+        self.taps = taps
+        self.elapsed = elapsed
+        self.target_rate = target_rate
+        # The stop condition was met before the duration ran out
+        self.stopped = stopped
+
+    @property
+    def rate(self) -> float:
+        return self.taps / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        reason = "stop condition met" if self.stopped else "duration over"
+        return f"{self.taps} taps in {self.elapsed:.2f}s, {self.rate:.1f}/s (target {self.target_rate:.1f}/s, {reason})"
+
+
+class TapBurst:
+    """
+    Sends taps in chunks of `chunk_duration` seconds through `send_chunk`,
+    which gets the taps with the pause to keep after each one and returns how
+    many it sent. Pauses are 1 / `rate` with up to `jitter` relative variation.
+
+    Each chunk goes out no earlier than the taps and pauses of the previous
+    one take on the host clock, so the rate holds even when the device
+    returns before running the script. Chunks are sent from a sender thread
+    while the calling thread polls `stop_condition`, so a slow check (e.g. a
+    template lookup) never stalls the taps. A stop takes effect after the
+    chunk in flight.
+
+    With `threaded` False (strategies whose input APIs are bound to the
+    thread that set them up) chunks go out on the calling thread, with the
+    stop condition checked between them.
+    """
+    def __init__(
+        self,
+        send_chunk: Callable[[List[BurstTap]], int],
+        make_tap: Callable[[], Tuple[int, int, int]],
+        rate: float,
+        jitter: float = 0.2,
+        chunk_duration: float = 0.25,
+        threaded: bool = True,
+    ):
+        self._send_chunk = send_chunk
+        self._make_tap = make_tap
+        self.rate = rate
+        self.jitter = min(max(jitter, 0.0), 0.9)
+        self.chunk_duration = chunk_duration
+        self.threaded = threaded
+        self._stop = threading.Event()
+        self._taps = 0
+
+    def _next_chunk(self, remaining: float) -> List[BurstTap]:
+        count = max(1, min(round(self.rate * self.chunk_duration), round(self.rate * remaining)))
+        chunk = []
+        for _ in range(count):
+            x, y, duration_ms = self._make_tap()
+            interval = random.uniform(1 - self.jitter, 1 + self.jitter) / self.rate
+            chunk.append((x, y, duration_ms, max(interval - duration_ms / 1000, 0.0)))
+        return chunk
+
+    def _send_next(self, deadline: float) -> Optional[float]:
+        """Send the next chunk, returns when the next one may go out. None once the burst is over"""
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        chunk = self._next_chunk(remaining)
+        chunk_started = time.time()
+        sent = self._send_chunk(chunk)
+        if not sent:
+            app_logger.warning("Tap burst aborted, the device didn't take the taps")
+            return None
+        self._taps += sent
+        # The device may take the script faster than it runs it (or ignore the sleeps),
+        # the next chunk waits for this one's share of the time on the host clock
+        return chunk_started + sum(duration_ms / 1000 + pause for _, _, duration_ms, pause in chunk)
+
+    def _send(self, deadline: float) -> None:
+        while not self._stop.is_set():
+            next_at = self._send_next(deadline)
+            if next_at is None:
+                break
+            self._stop.wait(next_at - time.time())
+
+    def _send_inline(self, deadline: float, stop_condition: Optional[Callable[[], bool]]) -> bool:
+        """Send chunks on this thread, returns whether the stop condition was met"""
+        while (next_at := self._send_next(deadline)) is not None:
+            if stop_condition is not None and stop_condition():
+                return True
+            time.sleep(max(next_at - time.time(), 0))
+        return False
+
+    def _send_threaded(self, deadline: float, stop_condition: Optional[Callable[[], bool]], check_interval: float) -> bool:
+        """Send chunks from a sender thread while polling the stop condition here, returns whether it was met"""
+        sender = threading.Thread(target=self._send, args=(deadline,), name="tap-burst", daemon=True)
+        sender.start()
+
+        stopped = False
+        while sender.is_alive():
+            if stop_condition is not None and stop_condition():
+                stopped = True
+                self._stop.set()
+                break
+            sender.join(timeout=check_interval)
+
+        sender.join()
+        return stopped
+
+    def run(self, duration: float, stop_condition: Optional[Callable[[], bool]] = None, check_interval: float = 0.2) -> BurstResult:
+        started_at = time.time()
+        if self.threaded:
+            stopped = self._send_threaded(started_at + duration, stop_condition, check_interval)
+        else:
+            stopped = self._send_inline(started_at + duration, stop_condition)
+
+        result = BurstResult(self._taps, time.time() - started_at, self.rate, stopped)
+        app_logger.info(f"Tap burst: {result}")
+        return result
@@ -1,14 +1,25 @@
-from typing import List, Optional, Literal
+import multiprocessing
+import time
+from typing import Callable, List, Optional, Literal, Tuple
 
 import numpy as np
 
-from .strategy import DeviceStrategy
+from .strategy import DeviceStrategy, crop_to_region
 from .adb import ADBDevice
 from .windows import WindowsDevice
+from .frame_source import FrameSource
+from .burst import BurstResult
+from .frame_cache import FrameCache
+from .gestures import GestureBatch, GestureResult
+from .input_queue import InputHandle, InputQueue
+from .settle import SettleDetector, SettleStats, changed_fraction
+from .shared_frames import SharedFrameSource
 from src.core.logging import app_logger
 from src.core.config import CONFIG
 
 swipe_cfg = CONFIG['ui_elements']['swipe']
+# Copies of a zero-copy frame retried when the capture process overwrote it meanwhile
+TORN_FRAME_RETRIES = 3
 
 # 3. Context
 class DeviceContext:
@@ -40,13 +51,123 @@ class DeviceContext:
 
         app_logger.debug(f"Device initialized for '{device_type}' device with {type(self._device_strategy).__name__} strategy.")
 
+        # Frames are reused by consecutive lookups until an input is sent or `capture.frame_ttl` passes
+        self.frame_cache = FrameCache(ttl=CONFIG['capture'].get('frame_ttl', 0.5))
+        # Clicks, swipes and back presses return right away and are sent in order by a worker
+        self.input_queue = InputQueue(self.frame_cache, threaded=self._device_strategy.threaded_input)
+        self.settle_stats = SettleStats()
+
+        # Optional background capture, see `capture.stream` in config.json.
+        # Never from a capture worker process, which imports this module too
+        self._frame_source: Optional[FrameSource | SharedFrameSource] = None
+        self._last_frame_seq = 0
+        if CONFIG['capture'].get('stream', False) and multiprocessing.parent_process() is None:
+            self.start_frame_stream()
+
+    def start_frame_stream(self) -> None:
+        """
+        Start capturing frames continuously into a ring buffer, on a thread or,
+        with `capture.stream_backend` "process", in a capture worker process
+        publishing to shared memory
+        """
+        if self._frame_source is None:
+            capture_cfg = CONFIG['capture']
+            if capture_cfg.get('stream_backend', 'thread') == 'process':
+                self._frame_source = SharedFrameSource(
+                    self._device_strategy.take_screenshot,
+                    name=capture_cfg.get('shared_memory_name', 'lw_frames'),
+                    slots=capture_cfg.get('shared_memory_slots', 8),
+                    min_interval=capture_cfg.get('stream_interval', 0.0),
+                    epoch_getter=lambda: self.frame_cache.applied_epoch,
+                )
+                # The worker can't read our epochs, applied ones are pushed into shared memory
+                self.frame_cache.add_listener(self._frame_source.publish_epoch)
+            else:
+                self._frame_source = FrameSource(
+                    self._device_strategy.take_screenshot,
+                    buffer_size=capture_cfg.get('stream_buffer', 3),
+                    min_interval=capture_cfg.get('stream_interval', 0.0),
+                    epoch_getter=lambda: self.frame_cache.applied_epoch,
+                )
+        self._frame_source.start()
+
+    def stop_frame_stream(self) -> None:
+        if self._frame_source is not None:
+            self._frame_source.stop()
+
+    @property
+    def is_streaming(self) -> bool:
+        return self._frame_source is not None and self._frame_source.running
+
     # The Context delegates some part of its behavior to the chosen Strategy object.
     @property
     def is_app_running(self) -> bool:
         return self._device_strategy.is_app_running
     
-    def click(self, x: int, y: int, duration: float = 0, delay='tap_delay', critical=False) -> None:
-        return self._device_strategy.click(x, y, duration, delay, critical)
+    def click(
+            self,
+            x: int,
+            y: int,
+            duration: float = 0,
+            delay='tap_delay',
+            critical=False,
+            verify: bool = False,
+            verify_region: Optional[Tuple[int, int, int, int]] = None,
+        ) -> InputHandle | bool:
+        """
+        Queue a tap, returns immediately. The tap delay runs on the input worker too.
+
+        With `verify` the call blocks and returns whether the tap did something:
+        `verify_region` (e.g. the tapped template's box, default a small patch
+        around the tap point) is compared before and after, and the tap is
+        repeated if the patch didn't change. The tap delay is replaced by that check.
+        """
+        if verify:
+            return self._verified_click(x, y, duration, critical, verify_region)
+        return self.input_queue.submit(
+            lambda: self._device_strategy.click(x, y, duration, critical=critical, delay=delay), f"click({x}, {y})",
+        )
+
+    def _verified_click(
+            self, x: int, y: int, duration: float, critical: bool, region: Optional[Tuple[int, int, int, int]],
+        ) -> bool:
+        verify_cfg = CONFIG['tap_verify']
+        if region is None:
+            region = self._patch_around(x, y, verify_cfg.get('patch_size', 48))
+
+        self.input_queue.wait_idle()
+        before = self.take_screenshot(region=region)
+
+        for attempt in range(verify_cfg.get('retries', 1) + 1):
+            if not self.input_queue.run(
+                lambda: self._device_strategy.click(x, y, duration, critical=critical, delay=None), f"click({x}, {y}) verified",
+            ):
+                return False
+            if before is None or self._patch_changed(region, before, verify_cfg):
+                return True
+            app_logger.info(f"Tap at ({x}, {y}) changed nothing (attempt {attempt + 1})")
+
+        app_logger.warning(f"Tap at ({x}, {y}) had no visible effect")
+        return False
+
+    def _patch_around(self, x: int, y: int, size: int) -> Tuple[int, int, int, int]:
+        width, height = self.get_screen_size()
+        half = size // 2
+        return max(x - half, 0), max(y - half, 0), min(x + half, width), min(y + half, height)
+
+    def _patch_changed(self, region: Tuple[int, int, int, int], before: np.ndarray, verify_cfg: dict) -> bool:
+        """Poll the patch until it differs from `before` or `tap_verify.timeout` passes"""
+        deadline = time.time() + verify_cfg.get('timeout', 1.0)
+        pixel_threshold = verify_cfg.get('pixel_threshold', 24)
+        min_changed = verify_cfg.get('min_changed', 0.05)
+        while True:
+            after = self.take_screenshot(region=region)
+            if after is not None and changed_fraction(before, after, pixel_threshold) >= min_changed:
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            self.wait_for_new_frame(min(verify_cfg.get('interval', 0.1), remaining))
 
     def swipe(
             self, 
@@ -61,17 +182,20 @@ class DeviceContext:
                 swipe_cfg['end_x'], 
                 swipe_cfg['end_y']
             )
-        ) -> None:
-        return self._device_strategy.swipe(direction, num_swipes, duration_ms, start=start, end=end)
+        ) -> InputHandle:
+        """Queue swipes, returns immediately"""
+        return self.input_queue.submit(
+            lambda: self._device_strategy.swipe(direction, num_swipes, duration_ms, start=start, end=end), f"swipe({direction})",
+        )
 
     def type_text(self, text: str) -> None:
-        return self._device_strategy.type_text(text)
+        return self.input_queue.run(lambda: self._device_strategy.type_text(text), "type_text")
 
     def launch_package(self, *args, **kwargs) -> bool:
-        return self._device_strategy.launch_package(*args, **kwargs)
+        return self.input_queue.run(lambda: self._device_strategy.launch_package(*args, **kwargs), "launch_package")
 
     def force_stop_package(self, *args, **kwargs) -> None:
-        return self._device_strategy.force_stop_package(*args, **kwargs)
+        return self.input_queue.run(lambda: self._device_strategy.force_stop_package(*args, **kwargs), "force_stop_package")
 
     def get_screen_size(self) -> tuple[int, int]:
         return self._device_strategy.get_screen_size()
@@ -79,8 +203,19 @@ class DeviceContext:
     def get_device_list(self) -> List[str]:
         return self._device_strategy.get_device_list()
 
-    def press_back(self) -> None:
-        return self._device_strategy.press_back()
+    def press_back(self) -> InputHandle:
+        """Queue a back press, returns immediately"""
+        return self.input_queue.submit(self._device_strategy.press_back, "press_back")
+
+    def wait_for_input(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued input was sent"""
+        return self.input_queue.wait_idle(timeout)
+
+    def run_gestures(self, batch: GestureBatch) -> GestureResult:
+        """Run a fixed tap/swipe/key/sleep sequence, in one device round trip where supported"""
+        result = self.input_queue.run(lambda: self._device_strategy.run_gestures(batch), "gestures")
+        app_logger.debug(f"Gestures done in {result.total * 1000:.0f}ms: {result.format_timings()}")
+        return result
 
     def get_connected_device(self) -> Optional[str]:
         return self._device_strategy.get_connected_device()
@@ -88,19 +223,146 @@ class DeviceContext:
     def simulate_shake(self) -> None:
         return self._device_strategy.simulate_shake()
 
-    def take_screenshot(self) -> Optional[np.ndarray]:
-        return self._device_strategy.take_screenshot()
+    def take_screenshot(self, fresh: bool = False, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """
+        Current frame of the device. Served from the frame cache or the frame
+        stream when possible, `fresh` always captures a new frame (it is still
+        stored in the cache).
+
+        With `region` (x1, y1, x2, y2) only that band is returned: cropped from
+        a cached/streamed frame, otherwise captured as a band by the strategy
+        (band captures are not cached).
+        """
+        if fresh or not self.is_streaming:
+            image = None if fresh else self.frame_cache.get()
+            if image is not None:
+                return crop_to_region(image, region)
+
+            # A frame taken while inputs are in flight may show them half applied
+            self.input_queue.wait_idle()
+            epoch, captured_at = self.frame_cache.applied_epoch, time.time()
+            image = self._device_strategy.take_screenshot(region=region)
+            if region is None:
+                self.frame_cache.put(image, epoch, captured_at)
+            return image
+
+        # Newest streamed frame captured after the last input, only blocks
+        # until the first frame after an input arrives
+        epoch = self.frame_cache.epoch
+        for _ in range(TORN_FRAME_RETRIES + 1):
+            frame = self._frame_source.latest()
+            if frame is None or frame.epoch < epoch:
+                frame = self._frame_source.wait_for_newer(
+                    frame.seq if frame else 0,
+                    timeout=CONFIG['capture'].get('stream_timeout', 5.0),
+                    min_epoch=epoch,
+                )
+            if frame is None:
+                return None
+
+            image = crop_to_region(frame.image, region)
+            if not self._frame_source.zero_copy:
+                break
+            # Callers may keep a frame for seconds (OCR, debug images), a shared memory view would change under them.
+            # The copy only counts if the slot wasn't rewritten while it was taken.
+            image = image.copy()
+            if self._frame_source.intact(frame):
+                break
+        else:
+            app_logger.warning(f"Streamed frame overwritten while copying it {TORN_FRAME_RETRIES + 1} times in a row")
+            return None
+
+        self._last_frame_seq = frame.seq
+        return image
+
+    def wait_for_new_frame(self, timeout: float) -> None:
+        """
+        Wait until a frame newer than the last one returned by `take_screenshot`
+        is available, for at most `timeout` seconds. Without a frame stream
+        there is nothing to wait on, so this just sleeps `timeout`.
+        """
+        if self.is_streaming:
+            self._frame_source.wait_for_newer(self._last_frame_seq, timeout, min_epoch=self.frame_cache.epoch)
+            return
+        time.sleep(timeout)
+        # The caller explicitly waits for a new frame, don't serve the cached one
+        self.frame_cache.expire()
 
     def cleanup_device_screenshots(self) -> None:
         return self._device_strategy.cleanup_device_screenshots()
 
-    def human_delay(self, *args, **kwargs) -> None:
+    def human_delay(self, *args, settle: bool = False, **kwargs) -> None:
+        """
+        Delays count from the moment queued inputs were sent, as with blocking inputs.
+        With `settle` the delay is only an upper bound, it ends as soon as the screen stops changing.
+        """
+        self.input_queue.wait_idle()
+        if settle:
+            self.wait_for_settle(self._device_strategy.resolve_delay(*args, **kwargs))
+            return
         return self._device_strategy.human_delay(*args, **kwargs)
+
+    def wait_for_settle(self, max: float) -> bool:
+        """
+        Wait until consecutive (downsampled) frames stop changing, for at most
+        `max` seconds. Returns True if the screen settled before that.
+        """
+        settle_cfg = CONFIG['settle']
+        detector = SettleDetector(
+            scale=settle_cfg.get('scale', 0.125),
+            pixel_threshold=settle_cfg.get('pixel_threshold', 12),
+            max_changed=settle_cfg.get('max_changed', 0.005),
+            stable_frames=settle_cfg.get('stable_frames', 2),
+        )
+        interval = settle_cfg.get('interval', 0.1)
+        # The screen may not have started animating yet right after an input
+        min_wait = settle_cfg.get('min_wait', 0.3)
+
+        self.input_queue.wait_idle()
+        started_at = time.time()
+        deadline = started_at + max
+        settled = False
+        while not settled:
+            frame = self.take_screenshot(fresh=not self.is_streaming)
+            settled = frame is not None and detector.feed(frame) and time.time() - started_at >= min_wait
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            if frame is None:
+                # Can't tell without frames, wait the full delay
+                time.sleep(remaining)
+                break
+            if not settled:
+                self.wait_for_new_frame(min(interval, remaining))
+
+        self.settle_stats.record(max, time.time() - started_at, settled)
+        return settled
     
-    def spam_click(self, x, y, duration=3, delay=0):
-        return self._device_strategy.spam_click(x, y, duration=duration, critical=False, delay=delay)
+    def spam_click(self, x, y, duration=3, delay=0, rate: float = None, stop_condition: Callable[[], bool] = None) -> BurstResult:
+        """Tap burst on (x, y), see DeviceStrategy.spam_click. `stop_condition`
+        is checked on frames captured after the burst started"""
+        def check_stop() -> bool:
+            # Taps keep going while checking, only frames captured from here on count
+            self.frame_cache.mark_applied(self.frame_cache.invalidate())
+            return stop_condition()
+
+        # Runs on this thread (the stop condition reads frames), after the queued inputs
+        self.input_queue.wait_idle()
+        self.frame_cache.invalidate()
+        try:
+            return self._device_strategy.spam_click(
+                x, y, duration=duration, critical=False, delay=delay, rate=rate,
+                stop_condition=check_stop if stop_condition is not None else None,
+            )
+        finally:
+            self.frame_cache.mark_applied(self.frame_cache.invalidate())
     
     def cleanup_temp_files(self) -> None:
         return self._device_strategy.cleanup_temp_files()
+
+    def log_performance_stats(self) -> None:
+        app_logger.info(f"Frame cache: {self.frame_cache.format_stats()}")
+        app_logger.info(f"Screen settle: {self.settle_stats.format_stats()}")
+        return self._device_strategy.log_performance_stats()
     
 device: DeviceContext = DeviceContext(CONFIG["env"])
\ No newline at end of file
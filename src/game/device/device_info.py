@@ -0,0 +1,94 @@
+"""Cached device metadata, refreshed only when the device reports a change"""
+
+import time
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+
+from src.core.logging import app_logger
+
+
+class DeviceInfo:
+    """
+    Keeps screen size, density, orientation and the foreground package so
+    they are queried from the device once instead of on every call.
+
+    Size, density and orientation are dropped on events: a captured frame
+    with different dimensions than the previous one means the device was
+    rotated or its resolution changed. Values with an entry in `ttls` are
+    also queried again once they are that many seconds old: a 180 degree
+    rotation keeps the frame size, so orientation needs one. The foreground
+    package is dropped when an app is launched or stopped, and after
+    `package_ttl` seconds since the app can also die on its own.
+    """
+    def __init__(self, package_ttl: float = 5.0, ttls: Optional[Dict[str, float]] = None):
+        self.package_ttl = package_ttl
+        self.ttls = ttls or {}
+        # {key: (value, queried at)}
+        self._values: Dict[str, Tuple[object, float]] = {}
+        self._package: Optional[str] = None
+        self._package_at = 0.0
+        self._frame_size: Optional[Tuple[int, int]] = None
+        self._lock = Lock()
+
+        self.queries = 0
+        self.hits = 0
+
+    def get(self, key: str, query: Callable[[], object]) -> object:
+        """Cached value for `key`, calls `query` on a miss or once the value is older than its ttl (None results are not cached)"""
+        with self._lock:
+            if key in self._values:
+                value, queried_at = self._values[key]
+                if key not in self.ttls or time.time() - queried_at < self.ttls[key]:
+                    self.hits += 1
+                    return value
+
+        value = query()
+        with self._lock:
+            self.queries += 1
+            previous = self._values.get(key)
+            if value is not None:
+                self._values[key] = (value, time.time())
+        if previous is not None and value is not None and previous[0] != value:
+            app_logger.info(f"Device {key} changed from {previous[0]} to {value}")
+        return value
+
+    def get_package(self, query: Callable[[], Optional[str]]) -> Optional[str]:
+        """Cached foreground package, calls `query` once it is older than `package_ttl`"""
+        with self._lock:
+            if self._package_at and time.time() - self._package_at < self.package_ttl:
+                self.hits += 1
+                return self._package
+
+        package = query()
+        with self._lock:
+            self.queries += 1
+            self._package = package
+            self._package_at = time.time()
+        return package
+
+    def invalidate(self, reason: str) -> None:
+        """Drop size, density and orientation"""
+        with self._lock:
+            if self._values:
+                app_logger.info(f"Device metadata invalidated: {reason}")
+            self._values.clear()
+
+    def invalidate_package(self) -> None:
+        with self._lock:
+            self._package_at = 0.0
+
+    def observe_frame(self, width: int, height: int) -> None:
+        """Invalidate the metadata when the captured frame size changes"""
+        with self._lock:
+            previous = self._frame_size
+            self._frame_size = (width, height)
+        if previous is None or previous == (width, height):
+            return
+
+        if previous == (height, width):
+            self.invalidate(f"rotated to {width}x{height}")
+        else:
+            self.invalidate(f"resolution changed from {previous[0]}x{previous[1]} to {width}x{height}")
+
+    def format_stats(self) -> str:
+        return f"hits={self.hits} queries={self.queries}"
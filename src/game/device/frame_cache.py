@@ -0,0 +1,107 @@
+"""Epoch based cache for the last captured frame"""
+
+import time
+from threading import Condition, Lock
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class FrameCache:
+    """
+    Keeps the last captured frame so consecutive template lookups reuse it.
+
+    Every input sent to the device (click, swipe, back press, ...) starts a new
+    epoch when it is issued, and the epoch counts as applied once the device
+    took the input. Captures are tagged with the applied epoch at their start;
+    a frame is only served while its epoch is current (no input issued since)
+    and it is younger than `ttl` seconds. Frames captured while an input was
+    in flight are never stored.
+    """
+    def __init__(self, ttl: float = 0.5):
+        self.ttl = ttl
+        self._epoch = 0
+        self._applied_epoch = 0
+        self._frame: Optional[np.ndarray] = None
+        self._frame_epoch = -1
+        self._captured_at = 0.0
+        self._lock = Lock()
+        self._applied = Condition(self._lock)
+        self._listeners: List[Callable[[int], None]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def epoch(self) -> int:
+        """Epoch of the last issued input"""
+        return self._epoch
+
+    @property
+    def applied_epoch(self) -> int:
+        """Epoch of the last input the device took, captures are tagged with it"""
+        return self._applied_epoch
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Call `listener(applied_epoch)` whenever an input was applied"""
+        self._listeners.append(listener)
+
+    def invalidate(self) -> int:
+        """Start a new epoch (an input was issued), returns the new epoch"""
+        with self._lock:
+            self._epoch += 1
+            self._frame = None
+            self.invalidations += 1
+            return self._epoch
+
+    def mark_applied(self, epoch: int) -> None:
+        """The input that started `epoch` was sent to the device"""
+        with self._lock:
+            if epoch <= self._applied_epoch:
+                return
+            self._applied_epoch = epoch
+            self._applied.notify_all()
+        for listener in self._listeners:
+            listener(epoch)
+
+    def wait_applied(self, epoch: int, timeout: Optional[float] = None) -> bool:
+        """Block until the input that started `epoch` (and all before it) was applied"""
+        with self._lock:
+            return self._applied.wait_for(lambda: self._applied_epoch >= epoch, timeout)
+
+    def expire(self) -> None:
+        """Drop the cached frame without starting a new epoch"""
+        with self._lock:
+            self._frame = None
+
+    def get(self) -> Optional[np.ndarray]:
+        """Cached frame of the current epoch, or None on a miss"""
+        with self._lock:
+            if (
+                self._frame is not None
+                and self._frame_epoch == self._epoch
+                and time.time() - self._captured_at < self.ttl
+            ):
+                self.hits += 1
+                return self._frame
+            self.misses += 1
+            return None
+
+    def put(self, frame: Optional[np.ndarray], epoch: int, captured_at: float) -> None:
+        """Store a frame whose capture started at `captured_at` with `epoch` applied"""
+        if frame is None:
+            return
+        with self._lock:
+            # An input was issued before or while capturing and not applied
+            # when the capture started, the frame may show either state
+            if epoch != self._epoch:
+                return
+            self._frame = frame
+            self._frame_epoch = epoch
+            self._captured_at = captured_at
+
+    def format_stats(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return f"hits={self.hits} misses={self.misses} hit_rate={hit_rate:.1f}% invalidations={self.invalidations}"
@@ -0,0 +1,126 @@
+"""Background frame source keeping the newest screenshots in a ring buffer"""
+
+import time
+from collections import deque
+from threading import Condition, Event, Thread
+from typing import Callable, Deque, Optional
+
+import numpy as np
+
+from src.core.logging import app_logger
+
+
+class Frame:
+    """A captured screenshot with its sequence number, input epoch and capture time"""
+    __slots__ = ("seq", "image", "epoch", "captured_at")
+
+    def __init__(self, seq: int, image: np.ndarray, epoch: int, captured_at: float):
+        self.seq = seq
+        self.image = image
+        self.epoch = epoch
+        self.captured_at = captured_at
+
+
+class FrameSource:
+    """
+    Continuously pulls frames from `capture` on a background thread and keeps
+    the last `buffer_size` of them. Readers get the newest frame without
+    blocking on a capture, and can wait for a frame newer than one they have
+    already seen.
+
+    `epoch_getter` returns the current input epoch (see FrameCache), each
+    frame is tagged with the epoch at the start of its capture.
+    """
+    # Frames are arrays of their own, never overwritten by later captures
+    zero_copy = False
+
+    def __init__(
+        self,
+        capture: Callable[[], Optional[np.ndarray]],
+        buffer_size: int = 3,
+        min_interval: float = 0.0,
+        epoch_getter: Callable[[], int] = lambda: 0,
+    ):
+        self._capture = capture
+        self._epoch_getter = epoch_getter
+        self._buffer: Deque[Frame] = deque(maxlen=max(1, buffer_size))
+        self._min_interval = min_interval
+        self._seq = 0
+        self._condition = Condition()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest frame (0 before the first frame)"""
+        return self._seq
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="frame-source", daemon=True)
+        self._thread.start()
+        app_logger.info("Frame source started")
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        app_logger.info("Frame source stopped")
+
+    def latest(self) -> Optional[Frame]:
+        """Newest frame in the buffer, or None if nothing was captured yet"""
+        with self._condition:
+            return self._buffer[-1] if self._buffer else None
+
+    def intact(self, frame: Frame) -> bool:
+        """Whether `frame` wasn't overwritten since it was handed out, always the case here"""
+        return True
+
+    def wait_for_newer(self, seq: int, timeout: float, min_epoch: int = 0) -> Optional[Frame]:
+        """Block until a frame with a sequence number above `seq`, captured
+        in `min_epoch` or later, arrives.
+
+        Returns the newest frame, or None if none arrived within `timeout`.
+        """
+        def is_ready() -> bool:
+            return self._seq > seq and self._buffer[-1].epoch >= min_epoch
+
+        with self._condition:
+            if not self._condition.wait_for(is_ready, timeout=timeout):
+                return None
+            return self._buffer[-1]
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop_event.is_set():
+            started_at = time.time()
+            epoch = self._epoch_getter()
+            try:
+                image = self._capture()
+            except Exception as e:
+                app_logger.error(f"Frame source capture failed: {e}")
+                image = None
+
+            if image is None:
+                # Back off while the device is unavailable
+                failures += 1
+                self._stop_event.wait(min(0.1 * 2 ** failures, 5.0))
+                continue
+
+            failures = 0
+            with self._condition:
+                self._seq += 1
+                self._buffer.append(Frame(self._seq, image, epoch, started_at))
+                self._condition.notify_all()
+
+            elapsed = time.time() - started_at
+            if elapsed < self._min_interval:
+                self._stop_event.wait(self._min_interval - elapsed)
@@ -0,0 +1,69 @@
+"""Sequences of taps, swipes, key presses and sleeps sent to the device as one unit"""
+
+from typing import List, Optional, Tuple, Union
+
+# Android KeyEvent codes
+KEYCODE_BACK = 4
+
+
+class GestureStep:
+    """One step of a GestureBatch, `kind` is "tap", "swipe", "key" or "sleep" """
+    def __init__(self, kind: str, **params):
+        self.kind = kind
+        self.params = params
+
+    def __repr__(self) -> str:
+        params = " ".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.kind} {params}".strip()
+
+
+class GestureBatch:
+    """
+    Builder for a fixed input sequence without decisions in between, e.g.
+
+        device.run_gestures(GestureBatch().sleep(2).back().sleep(1))
+
+    Steps are humanized like the single commands (tap position and duration
+    jitter, `sleep_multiplier`), delays take seconds or a CONFIG['timings'] key.
+    """
+    def __init__(self):
+        self.steps: List[GestureStep] = []
+
+    def tap(self, x: int, y: int, duration: float = None, critical: bool = False) -> 'GestureBatch':
+        self.steps.append(GestureStep("tap", x=x, y=y, duration=duration, critical=critical))
+        return self
+
+    def swipe(self, start: Tuple[int, int], end: Tuple[int, int], duration_ms: int = 300) -> 'GestureBatch':
+        self.steps.append(GestureStep("swipe", start=start, end=end, duration_ms=duration_ms))
+        return self
+
+    def key(self, keycode: int) -> 'GestureBatch':
+        self.steps.append(GestureStep("key", keycode=keycode))
+        return self
+
+    def back(self) -> 'GestureBatch':
+        return self.key(KEYCODE_BACK)
+
+    def sleep(self, delay: Union[float, str], default: float = 1) -> 'GestureBatch':
+        self.steps.append(GestureStep("sleep", delay=delay, default=default))
+        return self
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+
+class GestureResult:
+    """
+    Outcome of a batch. `timings` holds (step, seconds) for the steps that
+    ran, as measured where they ran (on the device for device-side batches).
+    """
+    def __init__(self, success: bool, timings: List[Tuple[GestureStep, float]], total: Optional[float] = None):
+        self.success = success
+        self.timings = timings
+        self.total = total if total is not None else sum(seconds for _, seconds in timings)
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def format_timings(self) -> str:
+        return ", ".join(f"{step}: {seconds * 1000:.0f}ms" for step, seconds in self.timings)
@@ -0,0 +1,95 @@
+"""Ordered, non-blocking input sending"""
+
+import queue
+import time
+from threading import Event, Thread
+from typing import Callable, Optional
+
+from src.core.logging import app_logger
+from .frame_cache import FrameCache
+
+
+class InputHandle:
+    """An input queued on an InputQueue, stamped with the input epoch it started"""
+    def __init__(self, epoch: int, description: str):
+        self.epoch = epoch
+        self.description = description
+        self.issued_at = time.time()
+        self.applied_at: Optional[float] = None
+        self.result = None
+        self._done = Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the input was sent, returns the strategy's result (None on timeout)"""
+        self._done.wait(timeout)
+        return self.result
+
+    def _finish(self, result) -> None:
+        self.result = result
+        self.applied_at = time.time()
+        self._done.set()
+
+    def __repr__(self) -> str:
+        state = f"applied after {(self.applied_at - self.issued_at) * 1000:.0f}ms" if self.done else "pending"
+        return f"<InputHandle {self.description} epoch={self.epoch} {state}>"
+
+
+class InputQueue:
+    """
+    Sends inputs in submission order on a worker thread, so `submit` returns
+    right away and the caller can keep matching or reading text meanwhile.
+
+    Every submitted input starts a new epoch in the FrameCache immediately
+    (issued) and marks it applied once the strategy call returned. Frames are
+    tagged with the applied epoch at the start of their capture, so a frame
+    is only served when every issued input was applied before it was taken.
+
+    With `threaded` False inputs run on the calling thread, for strategies
+    whose input APIs are bound to the thread that set them up.
+    """
+    def __init__(self, frame_cache: FrameCache, threaded: bool = True):
+        self.frame_cache = frame_cache
+        self.threaded = threaded
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[Thread] = None
+
+    def submit(self, action: Callable[[], object], description: str = "input") -> InputHandle:
+        handle = InputHandle(self.frame_cache.invalidate(), description)
+        if not self.threaded:
+            self._apply(handle, action)
+            return handle
+
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(target=self._run, name="input-queue", daemon=True)
+            self._thread.start()
+        self._queue.put((handle, action))
+        return handle
+
+    def run(self, action: Callable[[], object], description: str = "input"):
+        """Submit and wait for the input, returns the strategy's result"""
+        return self.submit(action, description).wait()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every input issued so far was applied"""
+        return self.frame_cache.wait_applied(self.frame_cache.epoch, timeout)
+
+    def _run(self) -> None:
+        while True:
+            handle, action = self._queue.get()
+            self._apply(handle, action)
+
+    def _apply(self, handle: InputHandle, action: Callable[[], object]) -> None:
+        result = None
+        try:
+            result = action()
+        except Exception as e:
+            app_logger.error(f"Input {handle.description} failed: {e}")
+            result = False
+        finally:
+            self.frame_cache.mark_applied(handle.epoch)
+            handle._finish(result)
+            app_logger.debug(f"Input {handle}")
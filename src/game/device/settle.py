@@ -0,0 +1,77 @@
+"""Detecting when the screen stopped changing, to cut animation delays short"""
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from src.core.logging import app_logger
+
+
+def settle_signature(image: np.ndarray, scale: float = 0.125) -> np.ndarray:
+    """Small grayscale version of a frame, cheap to compare and blind to noise"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def changed_fraction(previous: np.ndarray, current: np.ndarray, pixel_threshold: int = 12) -> float:
+    """Share of pixel values (per channel for color images) that differ by more than `pixel_threshold`"""
+    if previous.shape != current.shape:
+        return 1.0
+    return np.count_nonzero(cv2.absdiff(previous, current) > pixel_threshold) / current.size
+
+
+class SettleStats:
+    """Time settle waits saved against the full delays, per automation cycle and in total"""
+    def __init__(self):
+        self.waits = 0
+        self.settled = 0
+        self.saved = 0.0
+        self._cycle_waits = 0
+        self._cycle_saved = 0.0
+
+    def record(self, max_wait: float, waited: float, settled: bool) -> None:
+        saved = max(max_wait - waited, 0.0)
+        self.waits += 1
+        self.settled += settled
+        self.saved += saved
+        self._cycle_waits += 1
+        self._cycle_saved += saved
+
+    def log_cycle(self) -> None:
+        """Log and reset the current cycle's savings, nothing when there were no waits"""
+        if not self._cycle_waits:
+            return
+        app_logger.info(
+            f"Screen settle: saved {self._cycle_saved:.1f}s over {self._cycle_waits} waits this cycle "
+            f"({self.format_stats()})"
+        )
+        self._cycle_waits = 0
+        self._cycle_saved = 0.0
+
+    def format_stats(self) -> str:
+        return f"total saved={self.saved:.1f}s waits={self.waits} settled early={self.settled}"
+
+
+class SettleDetector:
+    """
+    Feeds consecutive frames, reports the screen settled once
+    `stable_frames` comparisons in a row changed at most `max_changed`
+    of the signature pixels.
+    """
+    def __init__(self, scale: float = 0.125, pixel_threshold: int = 12, max_changed: float = 0.005, stable_frames: int = 2):
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.max_changed = max_changed
+        self.stable_frames = stable_frames
+        self._previous: Optional[np.ndarray] = None
+        self._stable = 0
+
+    def feed(self, image: np.ndarray) -> bool:
+        """Add the next frame, returns True once the screen is settled"""
+        signature = settle_signature(image, self.scale)
+        if self._previous is not None:
+            changed = changed_fraction(self._previous, signature, self.pixel_threshold)
+            self._stable = self._stable + 1 if changed <= self.max_changed else 0
+        self._previous = signature
+        return self._stable >= self.stable_frames
@@ -0,0 +1,287 @@
+"""Frame ring buffer in shared memory, filled by a dedicated capture process"""
+
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.core.logging import app_logger
+from .frame_source import Frame
+
+# Control block: slot count, slot size, newest sequence number, current input
+# epoch (written by the automation process), stop flag
+_CONTROL_FIELDS = 5
+_SLOTS, _SLOT_BYTES, _SEQ, _EPOCH, _STOP = range(_CONTROL_FIELDS)
+# Per slot: sequence number (-1 while being written), epoch, height, width,
+# channels, capture time in microseconds
+_META_FIELDS = 6
+
+
+class SharedFrameRing:
+    """
+    Fixed size ring of decoded frames in a named `multiprocessing.shared_memory`
+    block. A single writer publishes frames under an increasing sequence
+    number; any number of readers, in any process, attach by name and get
+    numpy views straight into the block (no copies).
+
+    A view stays valid until the writer wraps around the ring, i.e. for
+    `slots - 1` more frames. Readers that keep a frame longer must copy it,
+    and check `intact` after the copy: the writer may have started on the
+    slot meanwhile, the copy is torn then.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._control = np.ndarray((_CONTROL_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.slots = int(self._control[_SLOTS])
+        self.slot_bytes = int(self._control[_SLOT_BYTES])
+        self._meta = np.ndarray(
+            (self.slots, _META_FIELDS), dtype=np.int64, buffer=shm.buf, offset=self._control.nbytes,
+        )
+        self._data = np.ndarray(
+            (self.slots, self.slot_bytes), dtype=np.uint8, buffer=shm.buf,
+            offset=self._control.nbytes + self._meta.nbytes,
+        )
+
+    @classmethod
+    def create(cls, name: str, slots: int, slot_bytes: int) -> 'SharedFrameRing':
+        size = 8 * (_CONTROL_FIELDS + slots * _META_FIELDS) + slots * slot_bytes
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over by a process that didn't shut down cleanly
+            app_logger.warning(f"Shared frame ring '{name}' already exists, replacing it")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        control = np.ndarray((_CONTROL_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        control[:] = 0
+        control[_SLOTS] = slots
+        control[_SLOT_BYTES] = slot_bytes
+        del control
+        ring = cls(shm, owner=True)
+        ring._meta[:, 0] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, child: bool = False) -> 'SharedFrameRing':
+        """Map an existing ring, e.g. from a recorder or live view process.
+        `child` is for processes started by the creator, which share its resource tracker."""
+        shm = shared_memory.SharedMemory(name=name)
+        if sys.version_info < (3, 13) and not child:
+            # Before 3.13 every attaching process registers the block and
+            # unlinks it on exit, only the creator may do that
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest frame (0 before the first frame)"""
+        return int(self._control[_SEQ])
+
+    @property
+    def epoch(self) -> int:
+        return int(self._control[_EPOCH])
+
+    @epoch.setter
+    def epoch(self, value: int) -> None:
+        self._control[_EPOCH] = value
+
+    @property
+    def stop_requested(self) -> bool:
+        return bool(self._control[_STOP])
+
+    def request_stop(self) -> None:
+        self._control[_STOP] = 1
+
+    def write(self, image: np.ndarray, epoch: int, captured_at: float) -> bool:
+        """Publish a frame, returns False if it doesn't fit into a slot"""
+        if image.nbytes > self.slot_bytes:
+            app_logger.error(f"Frame of {image.nbytes} bytes doesn't fit the {self.slot_bytes} byte shared memory slots")
+            return False
+
+        seq = self.seq + 1
+        slot = seq % self.slots
+        meta = self._meta[slot]
+        # Readers skip the slot until the frame is complete
+        meta[0] = -1
+        self._data[slot, :image.nbytes] = np.ascontiguousarray(image).reshape(-1)
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        meta[1:] = (epoch, height, width, channels, int(captured_at * 1_000_000))
+        meta[0] = seq
+        self._control[_SEQ] = seq
+        return True
+
+    def latest(self) -> Optional[Frame]:
+        """Newest complete frame as a view into shared memory, or None"""
+        seq = self.seq
+        if seq == 0:
+            return None
+
+        slot_seq, epoch, height, width, channels, captured_at_us = (int(v) for v in self._meta[seq % self.slots])
+        if slot_seq != seq:
+            # Overwritten or being written, only possible when the reader fell a full ring behind
+            return None
+
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        image = self._data[seq % self.slots, :height * width * channels].reshape(shape)
+        return Frame(seq, image, epoch, captured_at_us / 1_000_000)
+
+    def intact(self, frame: Frame) -> bool:
+        """Whether the writer left the slot of `frame` alone so far (it marks a slot -1 before writing to it)"""
+        return int(self._meta[frame.seq % self.slots, 0]) == frame.seq
+
+    def close(self) -> None:
+        """Unmap the block, the creator also removes it"""
+        self._control = self._meta = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Frames handed out are still referenced, the mapping goes away with them
+            pass
+        if self._owner:
+            self._shm.unlink()
+
+
+def run_capture_worker(ring_name: str, min_interval: float) -> None:
+    """Entry point of the capture process: captures frames into the ring until asked to stop"""
+    # Imported here, the device is set up in the worker process, not passed from the parent
+    from src.game.device import device
+
+    ring = SharedFrameRing.attach(ring_name, child=True)
+    capture = device._device_strategy.take_screenshot
+    parent = multiprocessing.parent_process()
+    app_logger.info(f"Capture worker started, publishing to shared memory '{ring_name}'")
+
+    failures = 0
+    try:
+        while not ring.stop_requested and (parent is None or parent.is_alive()):
+            started_at = time.time()
+            epoch = ring.epoch
+            try:
+                image = capture()
+            except Exception as e:
+                app_logger.error(f"Capture worker capture failed: {e}")
+                image = None
+
+            if image is None:
+                # Back off while the device is unavailable
+                failures += 1
+                time.sleep(min(0.1 * 2 ** failures, 5.0))
+                continue
+
+            failures = 0
+            ring.write(image, epoch, started_at)
+
+            elapsed = time.time() - started_at
+            if elapsed < min_interval:
+                time.sleep(min_interval - elapsed)
+    finally:
+        ring.close()
+        app_logger.info("Capture worker stopped")
+
+
+class SharedFrameSource:
+    """
+    Same interface as FrameSource, but frames are captured by a separate
+    process into a SharedFrameRing, so capture and decoding don't hold this
+    process's GIL. The ring is sized from one frame captured on start.
+    """
+    # Frames are views into ring slots that later captures overwrite
+    zero_copy = True
+
+    def __init__(
+        self,
+        capture: Callable[[], Optional[np.ndarray]],
+        name: str = "lw_frames",
+        slots: int = 8,
+        min_interval: float = 0.0,
+        epoch_getter: Callable[[], int] = lambda: 0,
+        poll_interval: float = 0.005,
+    ):
+        self._capture = capture
+        self._epoch_getter = epoch_getter
+        self._name = name
+        self._slots = max(2, slots)
+        self._min_interval = min_interval
+        self._poll_interval = poll_interval
+        self._ring: Optional[SharedFrameRing] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def seq(self) -> int:
+        return self._ring.seq if self._ring is not None else 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        epoch = self._epoch_getter()
+        first = self._capture()
+        if first is None:
+            app_logger.error("Capture worker not started: no frame to size the shared memory from")
+            return
+
+        self._ring = SharedFrameRing.create(self._name, self._slots, first.nbytes)
+        self._ring.epoch = epoch
+        self._ring.write(first, epoch, time.time())
+
+        # spawn everywhere, matching Windows, so the worker never inherits threads or sockets
+        context = multiprocessing.get_context("spawn")
+        self._process = context.Process(
+            target=run_capture_worker, args=(self._ring.name, self._min_interval),
+            name="capture-worker", daemon=True,
+        )
+        self._process.start()
+        app_logger.info(f"Capture worker process started (pid {self._process.pid})")
+
+    def stop(self) -> None:
+        if self._ring is None:
+            return
+        self._ring.request_stop()
+        if self._process is not None:
+            self._process.join(timeout=10)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        self._ring.close()
+        self._ring = None
+        app_logger.info("Capture worker process stopped")
+
+    def publish_epoch(self, epoch: int) -> None:
+        """Tell the worker the input epoch changed, frames are tagged with it"""
+        if self._ring is not None:
+            self._ring.epoch = epoch
+
+    def latest(self) -> Optional[Frame]:
+        return self._ring.latest() if self._ring is not None else None
+
+    def intact(self, frame: Frame) -> bool:
+        return self._ring is not None and self._ring.intact(frame)
+
+    def wait_for_newer(self, seq: int, timeout: float, min_epoch: int = 0) -> Optional[Frame]:
+        """Poll until a frame newer than `seq`, captured in `min_epoch` or later, arrives"""
+        deadline = time.time() + timeout
+        while self._ring is not None:
+            frame = self._ring.latest()
+            if frame is not None and frame.seq > seq and frame.epoch >= min_epoch:
+                return frame
+            if time.time() >= deadline:
+                return None
+            time.sleep(self._poll_interval)
+        return None
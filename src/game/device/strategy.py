@@ -2,7 +2,7 @@ import os
 import random
 import time
 from abc import ABC, abstractmethod
-from typing import List, Optional, Union
+from typing import Callable, List, Optional, Tuple, Union
 import concurrent.futures
 import cv2
 import numpy as np
@@ -10,10 +10,19 @@ import numpy as np
 from src.core.helpers import throttle
 from src.core.logging import app_logger
 from src.core.config import CONFIG
+from .burst import BurstResult, BurstTap, TapBurst
+from .gestures import KEYCODE_BACK, GestureBatch, GestureResult
 
 file_save_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 swipe_cfg = CONFIG['ui_elements']['swipe']
 
+def crop_to_region(image: Optional[np.ndarray], region: Optional[Tuple[int, int, int, int]]) -> Optional[np.ndarray]:
+    """Crop a frame to an (x1, y1, x2, y2) region, returns a view (no copy)"""
+    if image is None or region is None:
+        return image
+    x1, y1, x2, y2 = region
+    return image[y1:y2, x1:x2]
+
 # 1. Strategy Interface
 class DeviceStrategy(ABC):
     """
@@ -21,6 +30,9 @@ class DeviceStrategy(ABC):
     of some algorithm. The Context uses this interface to call the algorithm
     defined by Concrete Strategies.
     """
+    # Inputs may be sent from the input queue's worker thread
+    threaded_input: bool = True
+
     @property
     @abstractmethod
     def is_app_running(self) -> str:
@@ -42,16 +54,7 @@ class DeviceStrategy(ABC):
             critical: Whether this is a critical press requiring higher precision
         """
         try:
-            if (duration == None):
-                duration = 0.1
-
-            # Apply position randomization
-            radius = CONFIG['randomization']['critical_radius'] if critical else CONFIG['randomization']['normal_radius']
-            rand_x = x + random.randint(-radius, radius)
-            rand_y = y + random.randint(-radius, radius)
-            
-            # Convert duration to milliseconds and add slight randomization
-            duration_ms = int(duration * 1000 * random.uniform(0.9, 1.1))
+            rand_x, rand_y, duration_ms = self._humanize_tap(x, y, duration, critical)
             
             # Execute long press
             success = self._perform_click(rand_x, rand_y, duration_ms)
@@ -65,6 +68,20 @@ class DeviceStrategy(ABC):
             app_logger.error(f"Error performing humanized long press: {e}")
             return False
 
+    def _humanize_tap(self, x: int, y: int, duration: float = None, critical: bool = False) -> Tuple[int, int, int]:
+        """Randomized tap position and duration, returns (x, y, duration_ms)"""
+        if (duration == None):
+            duration = 0.1
+
+        # Apply position randomization
+        radius = CONFIG['randomization']['critical_radius'] if critical else CONFIG['randomization']['normal_radius']
+        rand_x = x + random.randint(-radius, radius)
+        rand_y = y + random.randint(-radius, radius)
+
+        # Convert duration to milliseconds and add slight randomization
+        duration_ms = int(duration * 1000 * random.uniform(0.9, 1.1))
+        return rand_x, rand_y, duration_ms
+
     @abstractmethod
     def _perform_click(self, x: int, y: int, duration_ms: int) -> None:
         """
@@ -174,8 +191,12 @@ class DeviceStrategy(ABC):
         pass
     
     @abstractmethod
-    def take_screenshot(self) -> Optional[np.ndarray]:
-        """Take screenshot and pull to local tmp directory"""
+    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """Take screenshot and pull to local tmp directory
+
+        Args:
+            region: (x1, y1, x2, y2) band of the screen to return instead of the full frame
+        """
 
     @abstractmethod
     def cleanup_device_screenshots(self) -> None:
@@ -189,6 +210,10 @@ class DeviceStrategy(ABC):
         Add a human-like delay between actions.
         The delay can be a float (seconds) or a string key to CONFIG['timings'].
         """
+        time.sleep(self.resolve_delay(delay, default, multiplier))
+
+    def resolve_delay(self, delay: Union[float, str], default: float = 1, multiplier: float = CONFIG.get('sleep_multiplier', 1.0)) -> float:
+        """Seconds `human_delay` would sleep for `delay`"""
         actual_delay: float
 
         if isinstance(delay, str):
@@ -203,20 +228,75 @@ class DeviceStrategy(ABC):
             actual_delay = float(delay)
 
         # Apply the sleep multiplier from CONFIG
-        final_delay = actual_delay * multiplier
-        """Add a human-like delay between actions"""
-        time.sleep(final_delay)
+        return actual_delay * multiplier
+
+    def run_gestures(self, batch: GestureBatch) -> GestureResult:
+        """
+        Run a GestureBatch. This default sends the steps one by one from the
+        host; strategies that can run the whole batch on the device override it.
+        """
+        timings = []
+        for step in batch.steps:
+            started_at = time.perf_counter()
+            if step.kind == "tap":
+                success = self.click(step.params['x'], step.params['y'], step.params['duration'], step.params['critical'], delay=None)
+            elif step.kind == "swipe":
+                success = self._perform_swipe(*step.params['start'], *step.params['end'], step.params['duration_ms'])
+            elif step.kind == "key" and step.params['keycode'] == KEYCODE_BACK:
+                success = self.press_back()
+            elif step.kind == "sleep":
+                self.human_delay(step.params['delay'], step.params['default'])
+                success = True
+            else:
+                app_logger.error(f"Gesture step '{step}' is not supported by {type(self).__name__}")
+                success = False
+
+            timings.append((step, time.perf_counter() - started_at))
+            if success is False:
+                return GestureResult(False, timings)
+        return GestureResult(True, timings)
 
-    def spam_click(self, x, y, duration=3, delay=0, critical=False):
-        # Define the total duration and the delay between clicks
+    def spam_click(
+            self,
+            x,
+            y,
+            duration=3,
+            delay=0,
+            critical=False,
+            rate: float = None,
+            stop_condition: Callable[[], bool] = None,
+        ) -> BurstResult:
+        """Tap (x, y) for `duration` seconds at `rate` taps per second (`tap_burst.rate`),
+        or slower when `delay` is longer than the tap interval. Stops early once
+        `stop_condition` returns True."""
+        burst_cfg = CONFIG['tap_burst']
+        rate = rate or burst_cfg.get('rate', 12.0)
+        if delay:
+            rate = min(rate, 1 / max(self.resolve_delay(delay), 1e-3))
+        tap_duration = burst_cfg.get('tap_duration', 0.03)
 
-        # Get the current time to start the timer
-        start_time = time.time()
+        burst = TapBurst(
+            self._send_tap_chunk,
+            lambda: self._humanize_tap(x, y, tap_duration, critical),
+            rate=rate,
+            jitter=burst_cfg.get('jitter', 0.2),
+            chunk_duration=burst_cfg.get('chunk_duration', 0.25),
+            threaded=self.threaded_input,
+        )
+        return burst.run(duration, stop_condition, check_interval=burst_cfg.get('stop_check_interval', 0.2))
 
-        # Loop for the specified duration
-        while time.time() - start_time < duration:
-            app_logger.debug(f"'spam_click': {time.time() - start_time}")
-            self.click(x, y, duration=0, delay=delay, critical=critical)
+    def _send_tap_chunk(self, taps: List[BurstTap]) -> int:
+        """Send burst taps one by one, returns how many went out.
+        Strategies with a faster channel send the whole chunk at once."""
+        for sent, (x, y, duration_ms, pause) in enumerate(taps):
+            if not self._perform_click(x, y, duration_ms):
+                return sent
+            time.sleep(pause)
+        return len(taps)
+
+    def log_performance_stats(self) -> None:
+        """Log device performance counters. Strategies without counters log nothing."""
+        pass
 
     @throttle(1)
     def _save_image_to_disk_background(self, filepath: str, image_np: np.ndarray):
@@ -0,0 +1,166 @@
+"""Touch injection by writing input events straight to the touchscreen device"""
+
+import re
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.logging import app_logger
+
+# Event types and codes from linux/input-event-codes.h
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+SYN_MT_REPORT = 0x02
+BTN_TOUCH = 0x14a
+ABS_MT_SLOT = 0x2f
+ABS_MT_TOUCH_MAJOR = 0x30
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+ABS_MT_PRESSURE = 0x3a
+
+# struct input_event: timeval (two longs), type, code, value.
+# The kernel stamps injected events itself, the time is left zero.
+EVENT_FORMAT_64 = "<qqHHi"
+EVENT_FORMAT_32 = "<llHHi"
+
+# Interval between move events of a swipe, about one display frame
+SWIPE_STEP_MS = 16
+
+# (natural width, natural height, rotation) of the display
+DisplayGeometry = Tuple[int, int, int]
+
+
+class TouchScreen:
+    """Touch device as listed by `getevent -pl`"""
+    def __init__(self, path: str, name: str, axes: Dict[str, Tuple[int, int]], direct: bool):
+        self.path = path
+        self.name = name
+        self.axes = axes
+        self.direct = direct
+
+    @property
+    def slotted(self) -> bool:
+        """Multi-touch protocol B (slots and tracking ids) instead of protocol A"""
+        return 'ABS_MT_SLOT' in self.axes or 'ABS_MT_TRACKING_ID' in self.axes
+
+
+def parse_touchscreens(getevent_output: str) -> List[TouchScreen]:
+    """Devices reporting multi-touch positions in `getevent -pl` output, direct (on screen) ones first"""
+    screens = []
+    for block in re.split(r'^add device \d+: ', getevent_output, flags=re.MULTILINE)[1:]:
+        path = block.split(None, 1)[0]
+        name = re.search(r'name:\s+"(.*)"', block)
+        axes = {
+            axis: (int(low), int(high))
+            for axis, low, high in re.findall(r'(ABS_MT_\w+)\s*: value -?\d+, min (-?\d+), max (-?\d+)', block)
+        }
+        if 'ABS_MT_POSITION_X' not in axes or 'ABS_MT_POSITION_Y' not in axes:
+            continue
+        screens.append(TouchScreen(path, name.group(1) if name else "", axes, 'INPUT_PROP_DIRECT' in block))
+
+    return sorted(screens, key=lambda screen: not screen.direct)
+
+
+class TouchInjector:
+    """
+    Builds shell scripts that inject taps and swipes by writing `input_event`
+    structs to the touchscreen's /dev/input node, like `sendevent` but with
+    a whole report per `printf` instead of one process per event.
+
+    `input tap/swipe` starts a Java process on the device for every call,
+    which costs tens to hundreds of milliseconds before the touch even
+    happens; these scripts run on the already open device shell.
+    """
+    def __init__(self, screen: TouchScreen, is_64bit: bool = True):
+        self.screen = screen
+        self._event_format = EVENT_FORMAT_64 if is_64bit else EVENT_FORMAT_32
+        self._tracking_id = 0
+
+    @classmethod
+    def detect(cls, shell: Callable[[str], Optional[str]]) -> Optional['TouchInjector']:
+        """Find the touchscreen via `shell`, None if the device has none we can drive"""
+        screens = parse_touchscreens(shell("getevent -pl") or "")
+        if not screens:
+            return None
+
+        abi = (shell("getprop ro.product.cpu.abi") or "").strip()
+        screen = screens[0]
+        app_logger.info(
+            f"Touchscreen '{screen.name}' at {screen.path} "
+            f"(protocol {'B' if screen.slotted else 'A'}, abi {abi or 'unknown'})"
+        )
+        return cls(screen, is_64bit='64' in abi or not abi)
+
+    def tap(self, x: int, y: int, duration_ms: int, display: DisplayGeometry) -> str:
+        """Script pressing (x, y) for `duration_ms`"""
+        tx, ty = self._to_touch(x, y, display)
+        return "\n".join([
+            self._write(self._down(tx, ty)),
+            f"sleep {duration_ms / 1000:.3f}",
+            self._write(self._up()),
+        ])
+
+    def swipe(self, start: Tuple[int, int], end: Tuple[int, int], duration_ms: int, display: DisplayGeometry) -> str:
+        """Script dragging from `start` to `end` over `duration_ms`"""
+        steps = max(1, duration_ms // SWIPE_STEP_MS)
+        lines = [self._write(self._down(*self._to_touch(*start, display)))]
+        for step in range(1, steps + 1):
+            x = start[0] + (end[0] - start[0]) * step // steps
+            y = start[1] + (end[1] - start[1]) * step // steps
+            lines.append(f"sleep {duration_ms / steps / 1000:.3f}")
+            lines.append(self._write(self._move(*self._to_touch(x, y, display))))
+        lines.append(self._write(self._up()))
+        return "\n".join(lines)
+
+    def _to_touch(self, x: int, y: int, display: DisplayGeometry) -> Tuple[int, int]:
+        """Map display coordinates to the touchscreen's raw axis values.
+        The panel reports in the natural orientation, the display may be rotated."""
+        width, height, rotation = display
+        if rotation == 1:
+            x, y = width - y, x
+        elif rotation == 2:
+            x, y = width - x, height - y
+        elif rotation == 3:
+            x, y = y, height - x
+        return self._scale('ABS_MT_POSITION_X', x, width), self._scale('ABS_MT_POSITION_Y', y, height)
+
+    def _scale(self, axis: str, value: int, size: int) -> int:
+        low, high = self.screen.axes[axis]
+        value = min(max(value, 0), size - 1)
+        return low + round(value * (high - low) / max(size - 1, 1))
+
+    def _contact(self, x: int, y: int) -> List[Tuple[int, int, int]]:
+        events = [(EV_ABS, ABS_MT_POSITION_X, x), (EV_ABS, ABS_MT_POSITION_Y, y)]
+        for axis, code in (('ABS_MT_PRESSURE', ABS_MT_PRESSURE), ('ABS_MT_TOUCH_MAJOR', ABS_MT_TOUCH_MAJOR)):
+            if axis in self.screen.axes:
+                low, high = self.screen.axes[axis]
+                events.append((EV_ABS, code, max(low + 1, (low + high) // 2)))
+        if not self.screen.slotted:
+            events.append((EV_SYN, SYN_MT_REPORT, 0))
+        return events
+
+    def _down(self, x: int, y: int) -> List[Tuple[int, int, int]]:
+        events = []
+        if self.screen.slotted:
+            low, high = self.screen.axes.get('ABS_MT_TRACKING_ID', (0, 65535))
+            self._tracking_id = self._tracking_id + 1 if self._tracking_id < high else max(low, 0)
+            events += [(EV_ABS, ABS_MT_SLOT, 0), (EV_ABS, ABS_MT_TRACKING_ID, self._tracking_id)]
+        return events + self._contact(x, y) + [(EV_KEY, BTN_TOUCH, 1), (EV_SYN, SYN_REPORT, 0)]
+
+    def _move(self, x: int, y: int) -> List[Tuple[int, int, int]]:
+        return self._contact(x, y) + [(EV_SYN, SYN_REPORT, 0)]
+
+    def _up(self) -> List[Tuple[int, int, int]]:
+        if self.screen.slotted:
+            events = [(EV_ABS, ABS_MT_SLOT, 0), (EV_ABS, ABS_MT_TRACKING_ID, -1)]
+        else:
+            events = [(EV_SYN, SYN_MT_REPORT, 0)]
+        return events + [(EV_KEY, BTN_TOUCH, 0), (EV_SYN, SYN_REPORT, 0)]
+
+    def _write(self, events: List[Tuple[int, int, int]]) -> str:
+        """`printf` writing the events in one write() so the report arrives whole"""
+        data = b"".join(struct.pack(self._event_format, 0, 0, *event) for event in events)
+        escaped = "".join(f"\\{byte:03o}" for byte in data)
+        return f"printf '{escaped}' > {self.screen.path}"
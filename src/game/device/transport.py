@@ -0,0 +1,389 @@
+"""Transports used by ADBDevice to run commands on the device"""
+
+import os
+import queue
+import re
+import socket
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from itertools import count
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Callable, List, Optional, Tuple
+
+from src.core.config import CONFIG
+from src.core.helpers import LatencyStats
+from src.core.logging import app_logger
+
+# Read size for streamed command output
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class AdbTransport(ABC):
+    """
+    Base class for ADB transports. Concrete transports implement `_shell` and
+    `_exec_out`, the base class times every command and keeps per-command
+    latency stats, keyed by the program name (`input`, `screencap`, `wm`, ...).
+    """
+    name: str = "base"
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self.stats = LatencyStats()
+
+    def shell(self, command: str, retry: bool = True) -> Optional[str]:
+        """
+        Run `adb shell <command>`, returns decoded stdout or None on failure.
+        Pass `retry=False` for commands that must not run twice (input), they
+        are only retried when they failed before reaching the device.
+        """
+        output = self._timed(command, self._shell, command, retry)
+        if output is None:
+            return None
+        return output.decode('utf-8', errors='replace')
+
+    def exec_out(self, command: str) -> Optional[bytes]:
+        """Run `adb exec-out <command>`, returns raw stdout bytes or None on failure"""
+        return self._timed(command, self._exec_out, command)
+
+    def exec_out_stream(self, command: str, consume: Callable[[bytes], None]) -> bool:
+        """Run `adb exec-out <command>` and pass stdout to `consume` chunk by
+        chunk as it arrives, returns False on failure"""
+        return bool(self._timed(command, self._exec_out_stream, command, consume))
+
+    def persistent_shell(self, command: str, key: Optional[str] = None) -> Optional[str]:
+        """
+        Run `command` in a long-lived device shell and return its output, with
+        stderr merged in, or None on failure. `key` names the command in the
+        latency stats. Transports without such a shell run a regular `shell`.
+        Commands here are input and never retried once sent.
+        """
+        output = self._timed(key or command, self._persistent_shell, command)
+        if output is None:
+            return None
+        return output.decode('utf-8', errors='replace')
+
+    def close(self) -> None:
+        """Release any resources held by the transport"""
+        pass
+
+    def _persistent_shell(self, command: str) -> Optional[bytes]:
+        return self._shell(f"{{ {command}\n}} 2>&1", False)
+
+    @abstractmethod
+    def _shell(self, command: str, retry: bool = True) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def _exec_out(self, command: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def _exec_out_stream(self, command: str, consume: Callable[[bytes], None]) -> bool:
+        pass
+
+    def _timed(self, command: str, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.record(command_key(command), elapsed)
+            app_logger.debug(f"[{self.name}] '{command_key(command)}' took {elapsed * 1000:.1f}ms")
+
+
+class SubprocessTransport(AdbTransport):
+    """
+    Spawns one `adb` client process per command (no persistent connection).
+    `persistent_shell` commands go to one `adb shell` process kept open. Its
+    output is read by a thread into a queue, so a command that doesn't finish
+    within `adb.transport_timeout` (a stuck sendevent, a wedged adbd) kills
+    the shell instead of blocking the input worker for good; pipes can't be
+    polled with a timeout on Windows.
+    """
+    name = "subprocess"
+
+    def __init__(self, device_id: str):
+        super().__init__(device_id)
+        self._interactive: Optional[subprocess.Popen] = None
+        self._interactive_lines: Optional[queue.Queue] = None
+        self._interactive_lock = Lock()
+        self._markers = count()
+
+    def _persistent_shell(self, command: str) -> Optional[bytes]:
+        with self._interactive_lock:
+            try:
+                if self._interactive is None or self._interactive.poll() is not None:
+                    self._interactive = subprocess.Popen(
+                        [CONFIG.adb['binary_path'], '-s', self.device_id, 'shell'],
+                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    )
+                    self._interactive_lines = queue.Queue()
+                    Thread(
+                        target=_read_lines, args=(self._interactive.stdout, self._interactive_lines),
+                        name="adb-shell-reader", daemon=True,
+                    ).start()
+                    self._interactive.stdin.write(b"exec 2>&1\n")
+
+                # The marker tells where the output of this command ends
+                marker = f"__done_{next(self._markers)}__".encode()
+                self._interactive.stdin.write(command.encode() + b"\necho " + marker + b"\n")
+                self._interactive.stdin.flush()
+
+                deadline = time.perf_counter() + CONFIG.adb.get('transport_timeout', 10.0)
+                output = bytearray()
+                while line := self._interactive_lines.get(timeout=max(deadline - time.perf_counter(), 0)):
+                    if line.rstrip().endswith(marker):
+                        output += line.rstrip()[:-len(marker)]
+                        return bytes(output)
+                    output += line
+            except OSError as e:
+                app_logger.warning(f"[{self.name}] Persistent shell failed: {e}")
+            except queue.Empty:
+                app_logger.warning(f"[{self.name}] Persistent shell timed out, restarting it")
+
+            # The shell went away or hangs, it is restarted on the next command
+            self._close_interactive()
+            return None
+
+    def _close_interactive(self) -> None:
+        if self._interactive is not None:
+            self._interactive.kill()
+            self._interactive.wait()
+            self._interactive = None
+            self._interactive_lines = None
+
+    def close(self) -> None:
+        with self._interactive_lock:
+            self._close_interactive()
+
+    def _run(self, args: List[str]) -> Optional[bytes]:
+        cmd = [CONFIG.adb['binary_path'], '-s', self.device_id] + args
+        result = subprocess.run(cmd, capture_output=True, check=False)
+
+        if result.returncode != 0:
+            error_output = result.stderr.decode(errors='replace').strip()
+            app_logger.error(f"ADB command {args} failed with return code {result.returncode}. Stderr: '{error_output}'")
+            return None
+
+        return result.stdout
+
+    def _shell(self, command: str, retry: bool = True) -> Optional[bytes]:
+        # Commands are never retried here
+        return self._run(['shell', command])
+
+    def _exec_out(self, command: str) -> Optional[bytes]:
+        return self._run(['exec-out', command])
+
+    def _exec_out_stream(self, command: str, consume: Callable[[bytes], None]) -> bool:
+        cmd = [CONFIG.adb['binary_path'], '-s', self.device_id, 'exec-out', command]
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            while chunk := process.stdout.read(STREAM_CHUNK_SIZE):
+                consume(chunk)
+            error_output = process.stderr.read().decode(errors='replace').strip()
+            returncode = process.wait()
+
+        if returncode != 0:
+            app_logger.error(f"ADB command ['exec-out', '{command}'] failed with return code {returncode}. Stderr: '{error_output}'")
+            return False
+        return True
+
+
+class AdbShellTransport(AdbTransport):
+    """
+    Keeps a connection to the device's adbd open via the `adb-shell`
+    package. Every command is a new stream multiplexed over that connection,
+    so no process is started on the host per command.
+
+    adb-shell connections can't be used from several threads at once, so
+    commands on a connection are serialized. `persistent_shell` commands
+    (input) get a second connection and never queue behind captures.
+    """
+    name = "adb_shell"
+
+    def __init__(self, device_id: str, host: str, port: int):
+        super().__init__(device_id)
+        self.host = host
+        self.port = port
+        self._devices = {}
+        self._transports = {}
+        self._connect_lock = Lock()
+        self._channel_locks = {"main": Lock(), "input": Lock()}
+
+    def _load_rsa_keys(self) -> Optional[list]:
+        """Load the adb client key so devices requiring auth accept the connection"""
+        key_path = Path(CONFIG.adb.get('rsa_key_path') or os.path.expanduser('~/.android/adbkey'))
+        if not key_path.exists():
+            return None
+
+        from adb_shell.auth.sign_pythonrsa import PythonRSASigner
+
+        with open(key_path) as f:
+            private_key = f.read()
+        public_key_path = Path(f"{key_path}.pub")
+        public_key = public_key_path.read_text() if public_key_path.exists() else ""
+        return [PythonRSASigner(public_key, private_key)]
+
+    def _get_device(self, channel: str = "main"):
+        """Returns the connected AdbDevice for `channel`, (re)connecting if needed"""
+        with self._connect_lock:
+            device = self._devices.get(channel)
+            if device is not None and device.available:
+                return device
+
+            from adb_shell.adb_device import AdbDevice
+
+            timeout_s = CONFIG.adb.get('transport_timeout', 10.0)
+            start = time.perf_counter()
+            transport = _no_delay_tcp_transport(self.host, self.port)
+            device = AdbDevice(transport, default_transport_timeout_s=timeout_s)
+            device.connect(rsa_keys=self._load_rsa_keys(), auth_timeout_s=timeout_s)
+            app_logger.info(f"[{self.name}] Connected {channel} channel to {self.host}:{self.port} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+            self._devices[channel] = device
+            self._transports[channel] = transport
+            return device
+
+    def _run(self, method: str, command: str, channel: str = "main", retry: bool = True) -> Optional[bytes]:
+        """
+        Retry once, the connection may have been dropped (emulator restart, adb
+        kill-server, ...). Without `retry` only failures before anything of the
+        command was written are retried: after that it may have run on the
+        device already (e.g. a read timeout), and running an input twice is a
+        double tap. A write into a dead socket the kernel still buffered counts
+        as sent, such an input is lost rather than repeated.
+        """
+        for attempt in range(2):
+            transport = writes = None
+            try:
+                with self._channel_locks[channel]:
+                    device = self._get_device(channel)
+                    transport = self._transports[channel]
+                    writes = transport.writes
+                    return getattr(device, method)(command, decode=False)
+            except Exception as e:
+                app_logger.warning(f"[{self.name}] '{command_key(command)}' failed (attempt {attempt + 1}): {e}")
+                self._close_channel(channel)
+                if not retry and transport is not None and transport.writes > writes:
+                    break
+        return None
+
+    def _persistent_shell(self, command: str) -> Optional[bytes]:
+        return self._run('shell', f"{{ {command}\n}} 2>&1", channel="input", retry=False)
+
+    def _shell(self, command: str, retry: bool = True) -> Optional[bytes]:
+        return self._run('shell', command, retry=retry)
+
+    def _exec_out(self, command: str) -> Optional[bytes]:
+        return self._run('exec_out', command)
+
+    def _exec_out_stream(self, command: str, consume: Callable[[bytes], None]) -> bool:
+        received = False
+        for attempt in range(2):
+            try:
+                with self._channel_locks["main"]:
+                    device = self._get_device()
+                    # adb-shell only exposes streaming for `shell:`, which may mangle
+                    # binary output on older devices, so stream the `exec:` service directly
+                    for chunk in device._streaming_service(b'exec', command.encode('utf8'), decode=False):
+                        received = True
+                        consume(chunk)
+                    return True
+            except Exception as e:
+                app_logger.warning(f"[{self.name}] '{command}' failed (attempt {attempt + 1}): {e}")
+                self._close_channel("main")
+                # Part of the output was already consumed, the caller has to start over
+                if received:
+                    break
+        return False
+
+    def _close_channel(self, channel: str) -> None:
+        with self._connect_lock:
+            device = self._devices.pop(channel, None)
+            self._transports.pop(channel, None)
+        if device is not None:
+            try:
+                device.close()
+            except Exception as e:
+                app_logger.debug(f"[{self.name}] Error closing {channel} connection: {e}")
+
+    def close(self) -> None:
+        for channel in list(self._devices):
+            self._close_channel(channel)
+
+
+def _read_lines(stream, lines: queue.Queue) -> None:
+    """Put the lines of `stream` into `lines`, then an empty line at EOF"""
+    for line in iter(stream.readline, b""):
+        lines.put(line)
+    lines.put(b"")
+
+
+def _no_delay_tcp_transport(host: str, port: int):
+    """
+    adb-shell TCP transport with Nagle's algorithm disabled. adb-shell writes
+    the message header and payload separately, with Nagle on every small
+    command waits for the delayed ACK (~40ms per round trip).
+    `writes` counts completed writes, to tell whether a failed command got out.
+    """
+    from adb_shell.transport.tcp_transport import TcpTransport
+
+    class NoDelayTcpTransport(TcpTransport):
+        writes = 0
+
+        def connect(self, transport_timeout_s):
+            super().connect(transport_timeout_s)
+            self._connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def bulk_write(self, data, transport_timeout_s):
+            written = super().bulk_write(data, transport_timeout_s)
+            self.writes += 1
+            return written
+
+    return NoDelayTcpTransport(host, port)
+
+
+def command_key(command: str) -> str:
+    """Key used for latency stats, e.g. 'input swipe ...' -> 'input swipe'"""
+    parts = command.split()
+    if not parts:
+        return "<empty>"
+    if parts[0] in ("input", "wm", "dumpsys", "am") and len(parts) > 1:
+        return f"{parts[0]} {parts[1]}"
+    return parts[0]
+
+
+def resolve_tcp_address(device_id: str) -> Optional[Tuple[str, int]]:
+    """
+    Get the adbd TCP address for a device serial:
+    'localhost:21503' -> ('localhost', 21503), 'emulator-5554' -> ('127.0.0.1', 5555).
+    USB serials have no TCP address and return None.
+    """
+    match = re.fullmatch(r'(.+):(\d+)', device_id)
+    if match:
+        return match.group(1), int(match.group(2))
+
+    match = re.fullmatch(r'emulator-(\d+)', device_id)
+    if match:
+        return "127.0.0.1", int(match.group(1)) + 1
+
+    return None
+
+
+def create_transport(device_id: str) -> AdbTransport:
+    """Create the transport configured in `adb.transport` ("adb_shell" or "subprocess")"""
+    transport_name = CONFIG.adb.get('transport', 'adb_shell')
+
+    if transport_name == 'adb_shell':
+        address = resolve_tcp_address(device_id)
+        if address is None:
+            app_logger.warning(f"Device '{device_id}' is not a TCP device, falling back to subprocess transport")
+        else:
+            try:
+                import adb_shell  # noqa: F401
+                return AdbShellTransport(device_id, *address)
+            except ImportError:
+                app_logger.warning("adb-shell is not installed, falling back to subprocess transport")
+
+    return SubprocessTransport(device_id)
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional, Union
+from typing import Any, List, Optional, Tuple, Union
 import time
 import os
 import re
@@ -14,11 +14,14 @@ from src.core.config import CONFIG
 from src.core.helpers import ensure_dir
 from src.core.logging import app_logger
 
-from .strategy import DeviceStrategy
+from .strategy import DeviceStrategy, crop_to_region
 
 # 2. Concrete Strategies
 
 class WindowsDevice(DeviceStrategy):
+    # pywinauto's COM objects belong to the thread that created them
+    threaded_input = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.device_id = os.getlogin()
@@ -255,8 +258,9 @@ class WindowsDevice(DeviceStrategy):
             app_logger.debug(f"Full error details: {traceback.format_exc()}")
             return None
 
-    def take_screenshot(self) -> Optional[np.ndarray]:
-        """Take screenshot of the LastWar app window and save to tmp/screen.png."""
+    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """Take screenshot of the LastWar app window and save to tmp/screen.png.
+        With `region` only that band is converted and returned (and nothing is saved)."""
         if not self.main_window:
             app_logger.error("[Windows] Cannot take screenshot: LastWar app window not connected. Reconnecting...")
             self._connect_to_lastwar_app()
@@ -269,11 +273,12 @@ class WindowsDevice(DeviceStrategy):
             # Capture screenshot of the specific window as a PIL Image
             pil_screenshot = self.main_window.capture_as_image()
             # Convert PIL Image to NumPy array (RGB)
-            numpy_screenshot = np.array(pil_screenshot)
+            numpy_screenshot = crop_to_region(np.array(pil_screenshot), region)
             # Convert RGB to BGR (OpenCV's default color order) for correct color representation
             numpy_screenshot = cv2.cvtColor(numpy_screenshot, cv2.COLOR_RGB2BGR)
             
-            self._save_image_to_disk_background(output_filepath, numpy_screenshot)
+            if region is None:
+                self._save_image_to_disk_background(output_filepath, numpy_screenshot)
             return numpy_screenshot
         except Exception as e:
             app_logger.error(f"[Windows] Error taking LastWar app screenshot: {e}")
@@ -0,0 +1,93 @@
+"""
+Capture and input latency benchmark for ADBDevice.
+
+Runs `take_screenshot`, `click`, `swipe` and `press_back` against a device
+(usually tools/fake_adbd.py) and reports p50/p95/p99 latency and operations
+per second, so transport and capture changes can be compared on the same
+numbers. Configured human delays are skipped, only device round trips count.
+
+Usage:
+    python -m tools.fake_adbd --port 5555 &
+    python -m tools.bench_latency --device 127.0.0.1:5555 --transport adb_shell --capture-mode raw
+"""
+
+import argparse
+import time
+from typing import Callable, Dict
+
+from src.core.config import CONFIG
+from src.core.helpers import LatencyStats
+from src.game.device.adb import ADBDevice
+
+OPERATIONS = ("take_screenshot", "click", "swipe", "press_back")
+
+
+def run_benchmark(device: ADBDevice, iterations: int, warmup: int = 3) -> Dict[str, Dict[str, float]]:
+    """Time each operation `iterations` times, returns LatencyStats summaries plus ops_per_s"""
+    width, height = device.get_screen_size()
+    operations: Dict[str, Callable[[], object]] = {
+        "take_screenshot": device.take_screenshot,
+        "click": lambda: device.click(width // 2, height // 2, duration=0.05, delay=None),
+        "swipe": lambda: device.swipe("up", duration_ms=200),
+        "press_back": device.press_back,
+    }
+
+    stats = LatencyStats(max_samples=iterations)
+    wall_times = {}
+    for name in OPERATIONS:
+        for _ in range(warmup):
+            operations[name]()
+
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            operations[name]()
+            stats.record(name, time.perf_counter() - start)
+        wall_times[name] = time.perf_counter() - started_at
+
+    report = stats.summary()
+    for name, summary in report.items():
+        summary["ops_per_s"] = summary["count"] / wall_times[name]
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'operation':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ops/s':>10}"]
+    for name, s in report.items():
+        lines.append(
+            f"{name:<16}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}{s['ops_per_s']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ADB capture and input latency")
+    parser.add_argument("--device", default="127.0.0.1:5555", help="Device serial, e.g. the fake adbd address")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--transport", choices=("adb_shell", "subprocess"), help="Override adb.transport")
+    parser.add_argument("--capture-mode", choices=("png", "raw", "raw_gzip"), help="Override adb.capture_mode")
+    parser.add_argument("--input-backend", choices=("sendevent", "input"), help="Override adb.input_backend")
+    args = parser.parse_args()
+
+    if args.transport:
+        CONFIG.adb["transport"] = args.transport
+    if args.capture_mode:
+        CONFIG.adb["capture_mode"] = args.capture_mode
+    if args.input_backend:
+        CONFIG.adb["input_backend"] = args.input_backend
+
+    device = ADBDevice(device_id=args.device)
+    # Only device round trips are measured, not the configured human delays
+    device.human_delay = lambda *args, **kwargs: None
+
+    report = run_benchmark(device, args.iterations)
+    input_backend = "sendevent" if device.touch is not None else "input"
+    print(
+        f"device={args.device} transport={device.transport.name} capture_mode={device.capture_mode} "
+        f"input_backend={input_backend} iterations={args.iterations}"
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Template matching benchmark: full resolution against pyramid matching.
+
+Matches every template on a set of frames once at full resolution and once
+coarse-to-fine (the per template `pyramid` factor), and reports the time of
+both, the speedup, and the recall of the pyramid run: the share of full
+resolution matches it found too, within a few pixels. Use real screenshots
+where possible; without `--frames` the templates are pasted onto synthetic
+backgrounds, which only shows the speed side.
+
+Usage:
+    python -m tools.bench_matching --frames "screenshots/*.png" --factor 2
+    python -m tools.bench_matching --templates left_bracket world_map --factor 3
+"""
+
+import argparse
+import glob
+import time
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from src.core.config import CONFIG
+import src.game  # noqa: F401  (resolves the device/image_processing import cycle)
+from src.core.image_processing import ScoredMatch, _load_template, _match_template_scored, match_cache
+from src.core.spatial_priors import spatial_priors
+from src.core.template_registry import template_registry
+
+# Pyramid matches further away than this from the full resolution one don't count
+RECALL_TOLERANCE_PX = 2
+
+
+def synthetic_frames(templates: List[str], count: int, size: Tuple[int, int] = (1080, 1920)) -> List[np.ndarray]:
+    """Smooth noise backgrounds with a few templates pasted at random spots"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (size[0] // 16, size[1] // 16, 3), dtype=np.uint8)
+        frame = cv2.resize(noise, (size[1], size[0]), interpolation=cv2.INTER_CUBIC)
+        for name in rng.choice(templates, size=min(len(templates), 8), replace=False):
+            template, _ = _load_template(name)
+            h, w = template.shape[:2]
+            if h >= size[0] or w >= size[1]:
+                continue
+            y, x = rng.integers(0, size[0] - h), rng.integers(0, size[1] - w)
+            frame[y:y + h, x:x + w] = template
+        frames.append(frame)
+    return frames
+
+
+def timed_matches(frame: np.ndarray, name: str, pyramid: int) -> Tuple[List[ScoredMatch], float]:
+    CONFIG.get(f"templates.{name}")["pyramid"] = pyramid
+    started_at = time.perf_counter()
+    matches = _match_template_scored(frame, name, file_name_getter=lambda *args: None)
+    return matches, time.perf_counter() - started_at
+
+
+def run_benchmark(frames: List[np.ndarray], templates: List[str], factor: int) -> Dict[str, Dict[str, float]]:
+    # Every run has to match for real, and the synthetic placements must not end up in the saved priors
+    enabled = match_cache.enabled, spatial_priors.enabled
+    match_cache.enabled = spatial_priors.enabled = False
+    try:
+        return _run_benchmark(frames, templates, factor)
+    finally:
+        match_cache.enabled, spatial_priors.enabled = enabled
+
+
+def _run_benchmark(frames: List[np.ndarray], templates: List[str], factor: int) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for name in templates:
+        original = CONFIG.get(f"templates.{name}").get("pyramid")
+        full_time = pyramid_time = 0.0
+        expected = found = 0
+        for frame in frames:
+            full, elapsed = timed_matches(frame, name, 0)
+            full_time += elapsed
+            coarse, elapsed = timed_matches(frame, name, factor)
+            pyramid_time += elapsed
+
+            expected += len(full)
+            found += sum(
+                any(abs(x - px) <= RECALL_TOLERANCE_PX and abs(y - py) <= RECALL_TOLERANCE_PX for px, py, _ in coarse)
+                for x, y, _ in full
+            )
+        CONFIG.get(f"templates.{name}")["pyramid"] = original
+
+        report[name] = {
+            "full_ms": full_time / len(frames) * 1000,
+            "pyramid_ms": pyramid_time / len(frames) * 1000,
+            "matches": expected,
+            "recall": found / expected if expected else 1.0,
+        }
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'template':<32}{'full ms':>10}{'pyramid ms':>12}{'speedup':>10}{'matches':>10}{'recall':>10}"]
+    for name, s in report.items():
+        lines.append(
+            f"{name:<32}{s['full_ms']:>10.1f}{s['pyramid_ms']:>12.1f}{s['full_ms'] / s['pyramid_ms']:>9.1f}x"
+            f"{s['matches']:>10}{s['recall']:>10.0%}"
+        )
+
+    full = sum(s["full_ms"] for s in report.values())
+    pyramid = sum(s["pyramid_ms"] for s in report.values())
+    expected = sum(s["matches"] for s in report.values())
+    found = sum(s["matches"] * s["recall"] for s in report.values())
+    lines.append(
+        f"{'total':<32}{full:>10.1f}{pyramid:>12.1f}{full / pyramid:>9.1f}x"
+        f"{expected:>10}{found / expected if expected else 1.0:>10.0%}"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark full resolution against pyramid template matching")
+    parser.add_argument("--frames", help="Glob of screenshots to match on, synthetic frames if omitted")
+    parser.add_argument("--synthetic", type=int, default=5, help="Number of synthetic frames without --frames")
+    parser.add_argument("--templates", nargs="*", help="Template names, all configured templates if omitted")
+    parser.add_argument("--factor", type=int, default=2, help="Pyramid downscale factor")
+    args = parser.parse_args()
+
+    templates = [name for name in (args.templates or template_registry.names()) if _load_template(name)[0] is not None]
+    if args.frames:
+        frames = [cv2.imread(path) for path in sorted(glob.glob(args.frames))]
+        frames = [frame for frame in frames if frame is not None]
+    else:
+        frames = synthetic_frames(templates, args.synthetic)
+    if not frames or not templates:
+        parser.error("No frames or templates to benchmark")
+
+    print(f"frames={len(frames)} templates={len(templates)} factor={args.factor} margin={CONFIG.get('pyramid_margin', 0.15)}")
+    print(format_report(run_benchmark(frames, templates, args.factor)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Local stand-in for a device's adbd, for measuring capture and input latency
+without a phone or emulator.
+
+Speaks the adb device protocol (CNXN/OPEN/OKAY/WRTE/CLSE over TCP, no auth),
+which is what the `adb_shell` transport talks to, and what the real adb
+server talks to after `adb connect 127.0.0.1:<port>` (so the subprocess
+transport works too). `screencap` serves recorded frames in turn, `input`
+commands and touch events written to the fake touchscreen are logged with
+timestamps.
+
+Usage:
+    python -m tools.fake_adbd --port 5555 --frames "records/frames/*.png"
+"""
+
+import argparse
+import glob
+import gzip
+import logging
+import os
+import re
+import socket
+import struct
+import threading
+import time
+from itertools import count
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("fake_adbd")
+
+VERSION = 0x01000000
+MAX_PAYLOAD = 256 * 1024
+MESSAGE_FORMAT = "<6I"
+MESSAGE_SIZE = struct.calcsize(MESSAGE_FORMAT)
+
+
+def _command_id(name: bytes) -> int:
+    return struct.unpack("<I", name)[0]
+
+
+A_CNXN = _command_id(b"CNXN")
+A_OPEN = _command_id(b"OPEN")
+A_OKAY = _command_id(b"OKAY")
+A_WRTE = _command_id(b"WRTE")
+A_CLSE = _command_id(b"CLSE")
+
+TOUCH_DEVICE = "/dev/input/event1"
+# 64-bit struct input_event: timeval, type, code, value
+TOUCH_EVENT_FORMAT = "<qqHHi"
+TOUCH_EVENT_SIZE = struct.calcsize(TOUCH_EVENT_FORMAT)
+
+
+class FakeDevice:
+    """Answers shell commands like a device would, from recorded frames"""
+    def __init__(
+        self,
+        frame_paths: List[str],
+        size: tuple = (1080, 1920),
+        package: str = "com.fun.lastwar.gp",
+        input_log: Optional[str] = None,
+        simulate_durations: bool = False,
+    ):
+        self.package = package
+        self.simulate_durations = simulate_durations
+        if input_log:
+            os.makedirs(os.path.dirname(input_log) or ".", exist_ok=True)
+        self._input_log = open(input_log, "a", encoding="utf-8") if input_log else None
+        self._log_lock = threading.Lock()
+        self._frame_index = count()
+        self._frames = [self._encode(image) for image in self._load_frames(frame_paths, size)]
+        height, width = self._frames[0]["shape"]
+        self.size = (width, height)
+        logger.info(f"Serving {len(self._frames)} frame(s) of {width}x{height}")
+
+    @staticmethod
+    def _load_frames(frame_paths: List[str], size: tuple) -> List[np.ndarray]:
+        frames = [cv2.imread(path) for path in frame_paths]
+        frames = [frame for frame in frames if frame is not None]
+        if frames:
+            return frames
+
+        # No recordings, serve a gradient so PNG/gzip sizes are still realistic-ish
+        width, height = size
+        gradient = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+        return [np.dstack([np.repeat(gradient, width, axis=1)] * 3)]
+
+    @staticmethod
+    def _encode(image: np.ndarray) -> Dict:
+        height, width = image.shape[:2]
+        # Android 9+ layout: width, height, format (1 = RGBA_8888), colorspace
+        raw = struct.pack("<4I", width, height, 1, 0) + cv2.cvtColor(image, cv2.COLOR_BGR2RGBA).tobytes()
+        return {
+            "shape": (height, width),
+            "raw": raw,
+            "raw_gzip": gzip.compress(raw, compresslevel=1),
+            "png": cv2.imencode(".png", image)[1].tobytes(),
+        }
+
+    def log_input(self, command: str) -> None:
+        line = f"{time.time():.6f}\t{command}"
+        logger.debug(line)
+        if self._input_log:
+            with self._log_lock:
+                self._input_log.write(line + "\n")
+                self._input_log.flush()
+
+    def getevent(self) -> bytes:
+        """`getevent -pl` listing a protocol B touchscreen matching the frame size"""
+        width, height = self.size
+        return (
+            f"add device 1: {TOUCH_DEVICE}\n"
+            f'  name:     "fake_touchscreen"\n'
+            f"  events:\n"
+            f"    KEY (0001): BTN_TOUCH\n"
+            f"    ABS (0003): ABS_MT_SLOT           : value 0, min 0, max 9, fuzz 0, flat 0, resolution 0\n"
+            f"                ABS_MT_POSITION_X     : value 0, min 0, max {width - 1}, fuzz 0, flat 0, resolution 0\n"
+            f"                ABS_MT_POSITION_Y     : value 0, min 0, max {height - 1}, fuzz 0, flat 0, resolution 0\n"
+            f"                ABS_MT_TRACKING_ID    : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0\n"
+            f"  input props:\n"
+            f"    INPUT_PROP_DIRECT\n"
+        ).encode()
+
+    def write_touch_events(self, command: str) -> bytes:
+        """Decode a `printf '<octal escapes>' > /dev/input/...` write and log the events"""
+        match = re.fullmatch(r"printf '((?:\\[0-7]{3})*)' > (\S+)", command)
+        if not match or match.group(2) != TOUCH_DEVICE:
+            return f"sh: can't write '{command[:40]}'\n".encode()
+
+        data = bytes(int(value, 8) for value in match.group(1).split("\\")[1:])
+        events = [
+            struct.unpack_from(TOUCH_EVENT_FORMAT, data, offset)[2:]
+            for offset in range(0, len(data) - TOUCH_EVENT_SIZE + 1, TOUCH_EVENT_SIZE)
+        ]
+        self.log_input("event " + " ".join(f"{type_}:{code:#x}:{value}" for type_, code, value in events))
+        return b""
+
+    def run(self, command: str) -> bytes:
+        """Output of `command`, each `;` or line separated part is answered in turn"""
+        # Scripts wrapped in `{ ...\n} 2>&1` by the transports
+        command = re.sub(r"^\s*\{|\}\s*2>&1\s*$", "", command)
+        parts = (part.strip() for part in re.split(r"[;\n]", command))
+        return b"".join(self._run_single(part) for part in parts if part)
+
+    def _run_single(self, command: str) -> bytes:
+        command = command.replace("2>/dev/null", "").strip()
+
+        if command.startswith("printf "):
+            return self.write_touch_events(command)
+
+        if command.startswith("sleep "):
+            if self.simulate_durations:
+                time.sleep(float(command.split()[1]))
+            return b""
+
+        if command.startswith("screencap"):
+            frame = self._frames[next(self._frame_index) % len(self._frames)]
+            if "gzip" in command:
+                return frame["raw_gzip"]
+            return frame["png"] if "-p" in command else frame["raw"]
+
+        if command.startswith("input"):
+            self.log_input(command)
+            match = re.fullmatch(r"input swipe \d+ \d+ \d+ \d+ (\d+)", command)
+            if self.simulate_durations and match:
+                time.sleep(int(match.group(1)) / 1000)
+            return b""
+
+        if command.startswith(("monkey", "am ")):
+            self.log_input(command)
+            return b""
+
+        if command == "wm size":
+            return f"Physical size: {self.size[0]}x{self.size[1]}\n".encode()
+        if command == "wm density":
+            return b"Physical density: 420\n"
+        if command.startswith("dumpsys window"):
+            return f"  mCurrentFocus=Window{{1 u0 {self.package}/{self.package}.MainActivity}}\n".encode()
+        if command.startswith("dumpsys input"):
+            return b"    SurfaceOrientation: 0\n"
+        if command == "date +%s%N":
+            return f"{time.time_ns()}\n".encode()
+        if command == "getevent -pl":
+            return self.getevent()
+        if command == "getprop ro.product.cpu.abi":
+            return b"x86_64\n"
+        if command.startswith(("rm ", "setprop")):
+            return b""
+
+        logger.warning(f"Unhandled command: '{command}'")
+        return b""
+
+
+class _Stream:
+    def __init__(self, local_id: int, remote_id: int):
+        self.local_id = local_id
+        self.remote_id = remote_id
+        self.ready = threading.Event()
+        self.closed = False
+
+
+class _Connection:
+    """One host connection, streams are served concurrently like a real adbd does"""
+    def __init__(self, sock: socket.socket, device: FakeDevice):
+        self.sock = sock
+        self.device = device
+        self.max_payload = MAX_PAYLOAD
+        self._send_lock = threading.Lock()
+        self._streams: Dict[int, _Stream] = {}
+        self._ids = count(1)
+
+    def send(self, command: int, arg0: int, arg1: int, data: bytes = b"") -> None:
+        checksum = int(np.frombuffer(data, dtype=np.uint8).sum(dtype=np.uint64)) & 0xFFFFFFFF if data else 0
+        header = struct.pack(MESSAGE_FORMAT, command, arg0, arg1, len(data), checksum, command ^ 0xFFFFFFFF)
+        with self._send_lock:
+            self.sock.sendall(header + data)
+
+    def _recv_exact(self, size: int) -> Optional[bytes]:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self.sock.recv(size - len(buffer))
+            if not chunk:
+                return None
+            buffer += chunk
+        return bytes(buffer)
+
+    def serve(self) -> None:
+        while True:
+            header = self._recv_exact(MESSAGE_SIZE)
+            if header is None:
+                break
+            command, arg0, arg1, length, _, _ = struct.unpack(MESSAGE_FORMAT, header)
+            data = self._recv_exact(length) if length else b""
+            if data is None:
+                break
+            self._dispatch(command, arg0, arg1, data)
+
+        for stream in self._streams.values():
+            stream.closed = True
+            stream.ready.set()
+        self.sock.close()
+
+    def _dispatch(self, command: int, arg0: int, arg1: int, data: bytes) -> None:
+        if command == A_CNXN:
+            self.max_payload = min(arg1, MAX_PAYLOAD) or MAX_PAYLOAD
+            banner = b"device::ro.product.name=fake;ro.product.model=fake_adbd;ro.product.device=fake;\0"
+            self.send(A_CNXN, VERSION, self.max_payload, banner)
+
+        elif command == A_OPEN:
+            service = data.rstrip(b"\0").decode(errors="replace")
+            stream = _Stream(local_id=next(self._ids), remote_id=arg0)
+            self._streams[stream.local_id] = stream
+            self.send(A_OKAY, stream.local_id, stream.remote_id)
+            threading.Thread(target=self._serve_stream, args=(stream, service), daemon=True).start()
+
+        elif command == A_OKAY:
+            stream = self._streams.get(arg1)
+            if stream:
+                stream.ready.set()
+
+        elif command == A_WRTE:
+            # Input for a stream (nothing we serve reads stdin), acknowledge it
+            self.send(A_OKAY, arg1, arg0)
+
+        elif command == A_CLSE:
+            stream = self._streams.pop(arg1, None)
+            if stream:
+                stream.closed = True
+                stream.ready.set()
+
+    def _serve_stream(self, stream: _Stream, service: str) -> None:
+        match = re.match(r"(shell|exec)(?:,[^:]*)?:(.*)", service, re.DOTALL)
+        output = self.device.run(match.group(2)) if match else b""
+        if not match:
+            logger.warning(f"Unsupported service: '{service}'")
+
+        for offset in range(0, len(output), self.max_payload):
+            if stream.closed:
+                return
+            # One WRTE in flight per stream, the host acknowledges each with OKAY
+            stream.ready.clear()
+            self.send(A_WRTE, stream.local_id, stream.remote_id, output[offset:offset + self.max_payload])
+            if not stream.ready.wait(timeout=10):
+                logger.warning(f"No OKAY for stream {stream.local_id}, giving up")
+                break
+
+        if not stream.closed:
+            self.send(A_CLSE, stream.local_id, stream.remote_id)
+
+
+def serve(device: FakeDevice, host: str = "127.0.0.1", port: int = 5555) -> None:
+    server = socket.create_server((host, port))
+    logger.info(f"fake adbd listening on {host}:{port}")
+    while True:
+        sock, address = server.accept()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        logger.info(f"Host connected from {address[0]}:{address[1]}")
+        threading.Thread(target=_Connection(sock, device).serve, daemon=True).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake adbd serving recorded frames")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--frames", default="", help="Glob of recorded frames (PNG/JPG), e.g. 'records/frames/*.png'")
+    parser.add_argument("--size", default="1080x1920", help="Size of the generated frame when no recordings are given")
+    parser.add_argument("--input-log", default="tmp/fake_adbd_input.log", help="File to log input commands to")
+    parser.add_argument("--simulate-durations", action="store_true", help="Block 'input swipe' and 'sleep' for their duration like a device")
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    width, height = (int(value) for value in args.size.split("x"))
+    device = FakeDevice(
+        sorted(glob.glob(args.frames)) if args.frames else [],
+        size=(width, height),
+        input_log=args.input_log,
+        simulate_durations=args.simulate_durations,
+    )
+    serve(device, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()